@@ -0,0 +1,126 @@
+import hashlib
+import json
+import logging
+from functools import lru_cache
+from typing import Dict, Optional, Protocol, Tuple
+
+from cachetools import TLRUCache
+
+from app.config import get_settings
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+class LLMCache(Protocol):
+    """
+    Async cache for model responses
+
+    Attributes:
+        stats: Hit/miss counters, exposed on the /metrics endpoint
+    """
+    stats: Dict[str, int]
+
+    async def get(self, key: str) -> Optional[str]:
+        ...
+
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        ...
+
+
+def _entry_expiry(key: str, entry: Tuple[str, int], now: float) -> float:
+    """Expiry time of an InMemoryLRU entry, stored as (value, ttl)"""
+    return now + entry[1]
+
+
+class InMemoryLRU:
+    """
+    Process-local LRU cache with per-entry TTLs, backed by cachetools.TLRUCache
+    """
+
+    def __init__(self, maxsize: int):
+        self._cache: TLRUCache = TLRUCache(maxsize=maxsize, ttu=_entry_expiry)
+        self.stats = {"hits": 0, "misses": 0}
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._cache.get(key)
+        self.stats["hits" if entry is not None else "misses"] += 1
+        return entry[0] if entry is not None else None
+
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        self._cache[key] = (value, ttl)
+
+
+class RedisBackend:
+    """
+    Cache shared across processes, backed by redis.asyncio
+
+    Requires the optional redis package. Redis errors are logged and treated
+    as cache misses so an unavailable cache never fails a model call.
+    """
+
+    def __init__(self, url: str, prefix: str = "llm:"):
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as e:
+            raise ImportError("The redis cache backend requires the 'redis' package (pip install redis)") from e
+
+        self._client = redis_asyncio.from_url(url, decode_responses=True)
+        self._prefix = prefix
+        self.stats = {"hits": 0, "misses": 0}
+
+    async def get(self, key: str) -> Optional[str]:
+        try:
+            value = await self._client.get(self._prefix + key)
+        except Exception as e:
+            logger.warning("Redis cache get failed: %s", e)
+            value = None
+        self.stats["hits" if value is not None else "misses"] += 1
+        return value
+
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        try:
+            await self._client.set(self._prefix + key, value, ex=ttl)
+        except Exception as e:
+            logger.warning("Redis cache set failed: %s", e)
+
+
+def make_cache_key(model_name: str, is_ceo: bool, prompt: str, max_output_tokens: Optional[int] = None) -> str:
+    """
+    Build a deterministic cache key for a model call
+
+    Args:
+        model_name: Name of the model
+        is_ceo: Whether the model is called as the CEO (selects the system prompt)
+        prompt: Prompt sent to the model
+        max_output_tokens: Output token budget, if the caller set one
+
+    Returns:
+        SHA-256 hex digest of the call parameters
+    """
+    params = {"m": model_name, "c": is_ceo, "p": prompt}
+    if max_output_tokens is not None:
+        # Left out when unset, so keys for default-budget calls are unchanged
+        params["t"] = max_output_tokens
+    payload = json.dumps(params, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@lru_cache(maxsize=1)
+def get_llm_cache() -> Optional[LLMCache]:
+    """
+    Return the configured response cache, or None if caching is disabled
+
+    Raises:
+        ValueError: If the configured backend is unknown
+    """
+    settings = get_settings()
+    backend = settings.cache_backend.lower()
+
+    if backend == "none":
+        return None
+    if backend == "memory":
+        return InMemoryLRU(maxsize=settings.cache_max_entries)
+    if backend == "redis":
+        return RedisBackend(settings.redis_url)
+    raise ValueError(f"Unsupported cache backend: {settings.cache_backend}")
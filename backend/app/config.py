@@ -1,7 +1,10 @@
+import json
 import os
+from dataclasses import dataclass, fields
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
-from pydantic_settings import BaseSettings
+from typing import Any, Optional, Tuple
+from dotenv import load_dotenv
 import logging
 
 # Configure logging
@@ -12,75 +15,107 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-class Settings(BaseSettings):
+@dataclass(frozen=True)
+class Settings:
     """
     Application settings loaded from environment variables
+
+    Each field is read from the upper-cased environment variable of the same
+    name (e.g. output_dir from OUTPUT_DIR), falling back to the default below.
     """
     # API Keys
     openai_api_key: Optional[str] = None
     anthropic_api_key: Optional[str] = None
     gemini_api_key: Optional[str] = None
-    
+
     # Paths
-    output_dir: str = "/Users/yzyy/Projects/rely_ai/backend/output"
-    
+    output_dir: str = str(Path(__file__).resolve().parent.parent / "output")  # backend/output
+
     # LLM configuration
     default_ceo_model: str = "gpt-4o"
-    
+    model_list_ttl: int = 300  # seconds to cache provider model catalogs
+
     # HTTP client configuration
     http_timeout: int = 120  # seconds
     max_retries: int = 3
-    
+
+    # Concurrency configuration
+    max_concurrency_per_provider: int = 8  # concurrent model calls per provider
+    thread_pool_size: int = 32  # workers in the default executor
+    warmup_providers: bool = True  # open provider connections at startup
+
+    # Response cache configuration
+    cache_backend: str = "memory"  # "memory", "redis" or "none"
+    cache_ttl: int = 3600  # seconds
+    cache_max_entries: int = 1024
+    redis_url: str = "redis://localhost:6379/0"
+
     # Server configuration
     host: str = "0.0.0.0"
     port: int = 8000
-    
+
     # API configuration
     api_prefix: str = "/api/v1"
-    
-    model_config = {
-        "env_file": ".env",
-        "env_file_encoding": "utf-8",
-        "extra": "ignore"  # This will ignore extra fields in the environment
-    }
-    
-    def validate(self):
+    cors_allow_origins: Tuple[str, ...] = ("*",)
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        """
+        Build settings from environment variables
+        """
+        values = {}
+        for f in fields(cls):
+            raw = os.getenv(f.name.upper())
+            if raw is not None:
+                values[f.name] = _parse_env_value(raw, f.default)
+        return cls(**values)
+
+    def validate(self) -> "Settings":
         """
         Validate the configuration
         """
-        # Try to load API keys from environment if not set
-        if not self.openai_api_key:
-            self.openai_api_key = os.getenv("OPENAI_API_KEY")
-            
-        if not self.anthropic_api_key:
-            self.anthropic_api_key = os.getenv("ANTHROPIC_API_KEY")
-            
-        if not self.gemini_api_key:
-            self.gemini_api_key = os.getenv("GEMINI_API_KEY")
-            
         # Create output directory if it doesn't exist
         Path(self.output_dir).mkdir(parents=True, exist_ok=True)
-        
-        # Check API keys and warn if still not set
+
+        # Check API keys and warn if not set
         if not self.openai_api_key:
             logger.warning("OPENAI_API_KEY is not set. OpenAI models will not be available.")
-        
+
         if not self.anthropic_api_key:
             logger.warning("ANTHROPIC_API_KEY is not set. Anthropic models will not be available.")
-            
+
         if not self.gemini_api_key:
             logger.warning("GEMINI_API_KEY is not set. Gemini models will not be available.")
-            
-        # Additionally attempt to load other environment variables
-        env_output_dir = os.getenv("OUTPUT_DIR")
-        if env_output_dir:
-            self.output_dir = env_output_dir
-            
-        env_ceo_model = os.getenv("DEFAULT_CEO_MODEL")
-        if env_ceo_model:
-            self.default_ceo_model = env_ceo_model
-            
+
         return self
 
-# Create and validate settings
-settings = Settings().validate()
\ No newline at end of file
+def _parse_env_value(raw: str, default: Any) -> Any:
+    """
+    Convert an environment variable string to the type of the field default
+
+    Args:
+        raw: Raw environment variable value
+        default: The field's default value
+
+    Returns:
+        The converted value
+    """
+    if isinstance(default, bool):
+        return raw.strip().lower() in ("1", "true", "yes", "on")
+    if isinstance(default, int):
+        return int(raw)
+    if isinstance(default, tuple):
+        # Accept a JSON list or a comma-separated string
+        if raw.lstrip().startswith("["):
+            return tuple(json.loads(raw))
+        return tuple(item.strip() for item in raw.split(",") if item.strip())
+    return raw
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Return the process-wide settings instance, created and validated on first use
+    """
+    # Populate os.environ from .env (existing variables take precedence)
+    load_dotenv()
+    return Settings.from_env().validate()
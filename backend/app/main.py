@@ -1,47 +1,67 @@
+import asyncio
 import uuid
 import logging
-import sys
-import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import Dict, Optional, List
-import xml.etree.ElementTree as ET
-
-# Add the parent directory to the Python path so that atoms can be imported
-sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+from lxml import etree as ET
 
 from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from fastapi.openapi.docs import get_swagger_ui_html
 from fastapi.staticfiles import StaticFiles
 
-from app.config import settings
+from app.cache import get_llm_cache
+from app.config import get_settings
+from app.middleware import FastCORSMiddleware
 from app.models import DecideRequest, DecideResponse, BoardResponse, ErrorResponse
 from app.utils import (
     parse_xml_input, 
     construct_board_prompt, 
-    construct_ceo_prompt, 
-    ensure_output_directory
+    construct_ceo_prompt
 )
-from app.service import call_model, process_board_responses, generate_board_decisions, generate_ceo_decision
+from app.service import call_model, process_board_responses, generate_board_decisions, generate_ceo_decision, warm_up_providers
+from atoms.llm_providers import http_client
 
-# Setup logging
-logging.basicConfig(level=logging.INFO)
+# Setup logging (handlers are configured in app.config)
 logger = logging.getLogger(__name__)
 
-# In-memory decision registry
+settings = get_settings()
+OUTPUT_ROOT = Path(settings.output_dir)
+OUTPUT_PARENT = OUTPUT_ROOT.parent
+
+# Per-request decision state. Responses are persisted to the output directory
+# rather than kept in memory, so nothing outlives the request.
 class DecisionStatus:
     def __init__(self, id: str, purpose: str, models: List[str]):
         self.id = id
         self.purpose = purpose
         self.models = models
-        self.board_responses: Dict[str, str] = {}
-        self.ceo_decision: Optional[str] = None
         self.status = "pending"
-        self.output_dir = ensure_output_directory(settings.output_dir, id)
+        # The output root is created once by Settings.validate(); decision ids
+        # are unique, so a single mkdir is all that's needed here
+        self.output_dir = OUTPUT_ROOT / id
+        self.output_dir.mkdir()
 
-# Global registry
-DECISIONS: Dict[str, DecisionStatus] = {}
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup and shutdown"""
+    # File writes and synchronous provider helpers run through
+    # asyncio.to_thread; size the default executor for them
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=settings.thread_pool_size)
+    )
+    
+    # Warm provider connections in the background so startup is not blocked
+    warmup_task = asyncio.ensure_future(warm_up_providers()) if settings.warmup_providers else None
+    yield
+    if warmup_task is not None:
+        warmup_task.cancel()
+    
+    # Close the provider connection pools
+    await http_client.aclose()
 
 # Initialize FastAPI with versioned API prefix
 app = FastAPI(
@@ -50,45 +70,51 @@ app = FastAPI(
     version="0.1.0",
     docs_url=None,
     redoc_url=None,
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
-# Add CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Add CORS middleware. The default allow-all policy uses precomputed headers;
+# restricted origin lists go through Starlette's CORSMiddleware.
+if settings.cors_allow_origins == ("*",):
+    app.add_middleware(FastCORSMiddleware)
+else:
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.cors_allow_origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
 
 # Serve generated markdown and prompt files
 app.mount(
     "/output",
-    StaticFiles(directory=settings.output_dir),
+    StaticFiles(directory=OUTPUT_ROOT),
     name="output",
 )
 
 # Exception handler
 @app.exception_handler(Exception)
 async def generic_exception_handler(request: Request, exc: Exception):
-    logger.error(f"Unhandled exception: {str(exc)}")
-    return JSONResponse(
+    logger.error("Unhandled exception: %s", exc)
+    return ORJSONResponse(
         status_code=500,
         content={"detail": "Internal server error", "message": str(exc)}
     )
 
 @app.exception_handler(ET.ParseError)
 async def xml_parse_error_handler(request: Request, exc: ET.ParseError):
-    logger.error(f"XML parsing error: {str(exc)}")
-    return JSONResponse(
+    logger.error("XML parsing error: %s", exc)
+    return ORJSONResponse(
         status_code=400,
         content={"detail": "Invalid XML format", "message": str(exc)}
     )
 
 @app.exception_handler(ValueError)
 async def value_error_handler(request: Request, exc: ValueError):
-    logger.error(f"Value error: {str(exc)}")
-    return JSONResponse(
+    logger.error("Value error: %s", exc)
+    return ORJSONResponse(
         status_code=400,
         content={"detail": "Validation error", "message": str(exc)}
     )
@@ -112,6 +138,17 @@ async def root():
         "version": "0.1.0"
     }
 
+@app.get("/metrics", tags=["Health"])
+async def metrics():
+    """Response cache statistics"""
+    cache = get_llm_cache()
+    return {
+        "llm_cache": {
+            "backend": settings.cache_backend,
+            **(cache.stats if cache is not None else {"hits": 0, "misses": 0}),
+        }
+    }
+
 @app.post("/decide", response_model=DecideResponse, tags=["Decisions"], responses={400: {"model": ErrorResponse}})
 async def decide(request: DecideRequest):
     """
@@ -128,88 +165,77 @@ async def decide(request: DecideRequest):
     """
     try:
         # Generate UUID for this decision
-        decision_id = str(uuid.uuid4())
-        logger.info(f"Processing new decision request: {decision_id}")
+        decision_id = uuid.uuid4().hex
+        logger.info("Processing new decision request: %s", decision_id)
         
         # Parse XML input
         try:
             purpose, factors, resources, board_models, ceo_model = parse_xml_input(request.prompt)
         except ET.ParseError as e:
             # Handle XML parsing errors explicitly
-            logger.error(f"XML parsing error: {str(e)}")
+            logger.error("XML parsing error: %s", e)
             raise HTTPException(status_code=400, detail=f"Invalid XML format: {str(e)}")
         except ValueError as e:
             # Handle validation errors
-            logger.error(f"Validation error: {str(e)}")
+            logger.error("Validation error: %s", e)
             raise HTTPException(status_code=400, detail=str(e))
         
         # If CEO model is not specified, use the default
         if not ceo_model:
             ceo_model = settings.default_ceo_model
-            logger.info(f"Using default CEO model: {ceo_model}")
+            logger.info("Using default CEO model: %s", ceo_model)
         
         # Create decision status
         decision = DecisionStatus(id=decision_id, purpose=purpose, models=board_models)
-        DECISIONS[decision_id] = decision
         
-        # Create output directory
-        output_dir = ensure_output_directory(settings.output_dir, decision_id)
+        output_dir = decision.output_dir
         
         # Stage 1: Fan-out - Generate board decisions in parallel
-        logger.info(f"Starting parallel model calls for {len(board_models)} board models")
-        board_responses = await generate_board_decisions(board_models, purpose, factors, resources)
-        logger.info(f"Completed all board model calls")
+        logger.info("Starting parallel model calls for %d board models", len(board_models))
+        board_responses = await generate_board_decisions(
+            board_models, purpose, factors, resources, max_output_tokens=request.max_output_tokens
+        )
+        logger.info("Completed all board model calls")
         
-        # Store board responses
-        board_paths = []
+        # Save board responses to files off the event loop, all concurrently
+        board_file_paths = [output_dir / f"board_{r['model_name']}.md" for r in board_responses]
+        await asyncio.gather(*[
+            asyncio.to_thread(path.write_text, r["response"], encoding="utf-8")
+            for path, r in zip(board_file_paths, board_responses)
+        ])
+        logger.info("Saved %d board responses", len(board_file_paths))
         
-        for response in board_responses:
-            model_name = response["model_name"]
-            model_response = response["response"]
-            
-            # Save board response to file
-            board_file_path = output_dir / f"board_{model_name}.md"
-            with open(board_file_path, "w") as f:
-                f.write(model_response)
-                
-            # Update decision status
-            decision.board_responses[model_name] = model_response
-            
-            # Record path for response
-            relative_path = str(board_file_path.relative_to(Path(settings.output_dir).parent))
-            board_paths.append(BoardResponse(
-                model=model_name, 
-                path=f"/{relative_path}"
-            ))
-            
-            logger.info(f"Saved board response for {model_name}")
+        # Record paths for response
+        board_paths = [
+            BoardResponse(model=r["model_name"], path=f"/{path.relative_to(OUTPUT_PARENT)}")
+            for r, path in zip(board_responses, board_file_paths)
+        ]
         
         # Stage 2: Fan-in - Generate CEO decision
-        logger.info(f"Generating CEO decision with {len(board_responses)} board responses")
+        logger.info("Generating CEO decision with %d board responses", len(board_responses))
         ceo_prompt = construct_ceo_prompt(purpose, factors, board_responses)
         
-        # Save CEO prompt to file
+        # Stage 3: Call CEO model, saving the CEO prompt to file in the meantime
         ceo_prompt_path = output_dir / "ceo_prompt.xml"
-        with open(ceo_prompt_path, "w") as f:
-            f.write(ceo_prompt)
-        
-        # Stage 3: Call CEO model
-        logger.info(f"Calling CEO model: {ceo_model}")
-        ceo_decision = await generate_ceo_decision(ceo_model, purpose, factors, board_responses)
+        logger.info("Calling CEO model: %s", ceo_model)
+        _, ceo_decision = await asyncio.gather(
+            asyncio.to_thread(ceo_prompt_path.write_text, ceo_prompt, encoding="utf-8"),
+            generate_ceo_decision(
+                ceo_model, purpose, factors, board_responses, max_output_tokens=request.max_output_tokens
+            ),
+        )
         
         # Save CEO decision to file
         ceo_decision_path = output_dir / "ceo_decision.md"
-        with open(ceo_decision_path, "w") as f:
-            f.write(ceo_decision)
+        await asyncio.to_thread(ceo_decision_path.write_text, ceo_decision, encoding="utf-8")
         
         # Update decision status
-        decision.ceo_decision = ceo_decision
         decision.status = "completed"
         
-        relative_ceo_path = str(ceo_decision_path.relative_to(Path(settings.output_dir).parent))
-        relative_ceo_prompt_path = str(ceo_prompt_path.relative_to(Path(settings.output_dir).parent))
+        relative_ceo_path = str(ceo_decision_path.relative_to(OUTPUT_PARENT))
+        relative_ceo_prompt_path = str(ceo_prompt_path.relative_to(OUTPUT_PARENT))
         
-        logger.info(f"Decision process completed: {decision_id}")
+        logger.info("Decision process completed: %s", decision_id)
         
         # Return complete response
         return DecideResponse(
@@ -224,7 +250,7 @@ async def decide(request: DecideRequest):
         # Re-raise HTTP exceptions
         raise
     except Exception as e:
-        logger.error(f"Error processing request: {str(e)}")
+        logger.error("Error processing request: %s", e)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 if __name__ == "__main__":
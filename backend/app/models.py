@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Dict, Optional
 
 
@@ -8,8 +8,14 @@ class DecideRequest(BaseModel):
     
     Attributes:
         prompt: XML content containing purpose, factors, decision resources and models
+        max_output_tokens: Optional output token budget for each model call
     """
+    model_config = ConfigDict(defer_build=True)
+
     prompt: str = Field(..., description="XML content with purpose, factors, decision resources and models")
+    max_output_tokens: Optional[int] = Field(
+        None, gt=0, description="Output token budget for each model call; the provider default when omitted"
+    )
 
 
 class BoardResponse(BaseModel):
@@ -20,6 +26,8 @@ class BoardResponse(BaseModel):
         model: The name of the model (e.g., "gpt-4o", "claude-3.5-sonnet")
         path: The filesystem path where the response is stored
     """
+    model_config = ConfigDict(defer_build=True)
+
     model: str = Field(..., description="Name of the board model")
     path: str = Field(..., description="Path to the model's response markdown file")
 
@@ -35,6 +43,8 @@ class DecideResponse(BaseModel):
         ceo_decision_path: Path to the CEO decision markdown file
         ceo_prompt: Path to the CEO prompt XML file
     """
+    model_config = ConfigDict(defer_build=True)
+
     id: str = Field(..., description="Unique identifier for this decision")
     status: str = Field(..., description="Status of the decision process")
     board: List[BoardResponse] = Field(..., description="List of board model responses")
@@ -50,5 +60,7 @@ class ErrorResponse(BaseModel):
         detail: Error detail message
         message: Optional additional error information
     """
+    model_config = ConfigDict(defer_build=True)
+
     detail: str = Field(..., description="Error detail message")
     message: Optional[str] = Field(None, description="Additional error information")
\ No newline at end of file
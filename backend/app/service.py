@@ -1,41 +1,187 @@
 import asyncio
+import importlib
 import logging
-import random
-import sys
-import os
-from typing import List, Dict, Any, Optional
+from random import random as _rand
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+from types import ModuleType
 from fastapi import HTTPException
 
-# Add the parent directory to the path
-sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
-
-from app.config import settings
-from app.utils import validate_model_name, construct_board_prompt, construct_ceo_prompt
-
-# Import LLM providers
-try:
-    from atoms.llm_providers import openai, anthropic, gemini
-    LLM_PROVIDERS_AVAILABLE = True
-except ImportError as e:
-    LLM_PROVIDERS_AVAILABLE = False
-    logging.getLogger(__name__).error(f"LLM providers not available. Make sure the atoms package is installed. Error: {e}")
+from app.cache import get_llm_cache, make_cache_key
+from app.config import get_settings
+from app.utils import validate_model_name, parse_model_name, construct_board_prompt, construct_ceo_prompt
+from atoms.llm_providers import FallbackModelList, http_client
+from atoms.llm_providers.singleflight import SingleFlight
 
 # Setup logging
 logger = logging.getLogger(__name__)
 
+settings = get_settings()
+MAX_RETRIES = settings.max_retries
+
+# Provider HTTP pools are created on first use; give them the configured timeout
+http_client.configure(timeout=settings.http_timeout)
+
+# System prompts for each role, sent separately from the XML prompt so the
+# static prefix is eligible for provider-side prompt caching
+_BOARD_SYSTEM_PROMPT = "You are a board member providing a detailed analysis."
+_CEO_SYSTEM_PROMPT = "You are the CEO making a final decision based on board member recommendations."
+
+# Exponential backoff caps in seconds (1, 2, 4, ... capped at 32), indexed by retry number - 1
+_BACKOFF_TABLE = tuple(min(2 ** i, 32) for i in range(16))
+
+# HTTP statuses worth retrying; any other 4xx will fail the same way again.
+# 529 is Anthropic's "overloaded" status.
+_RETRYABLE_STATUS = frozenset({408, 409, 429, 500, 502, 503, 504, 529})
+
+# Upper bound on a provider-requested Retry-After delay, in seconds
+_MAX_RETRY_AFTER = 60.0
+
+# Cached result of list_available_models and its monotonic expiry time
+_model_list_cache: Dict[str, Any] = {"data": None, "expiry": 0.0}
+
+# Per-provider semaphores bounding concurrent model calls, so each provider
+# sees a bounded number of in-flight requests while calls to different
+# providers stay fully parallel. asyncio primitives cannot be shared across
+# event loops, so keep one set per loop.
+_provider_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+
+def _get_provider_semaphore(provider_name: str) -> asyncio.Semaphore:
+    """Return the concurrency semaphore for a provider on the running event loop"""
+    semaphores = _provider_semaphores.setdefault(asyncio.get_running_loop(), {})
+    semaphore = semaphores.get(provider_name)
+    if semaphore is None:
+        semaphore = semaphores[provider_name] = asyncio.Semaphore(settings.max_concurrency_per_provider)
+    return semaphore
+
+# In-flight model calls keyed by make_cache_key(model, role, prompt), so that
+# identical concurrent calls share one request
+_inflight_calls = SingleFlight()
+
 class ModelCallRetryError(Exception):
     """Exception raised when a model call fails after all retries"""
     pass
 
-async def call_model_with_retry(model_name: str, prompt: str, is_ceo: bool = False, max_retries: int = None) -> str:
+def _classify_error(error: BaseException) -> Tuple[bool, Optional[float]]:
+    """
+    Decide whether a failed model call should be retried
+    
+    Providers wrap SDK errors in ValueError, so the exception chain is searched
+    for the underlying API error, identified by its HTTP status (status_code on
+    the OpenAI and Anthropic SDKs, code on google-genai).
+    
+    Args:
+        error: The exception raised by the call
+        
+    Returns:
+        Tuple of (retryable, retry_after), where retry_after is the delay in
+        seconds requested by the provider, or None
+    """
+    exc: Optional[BaseException] = error
+    while exc is not None:
+        status = getattr(exc, "status_code", None) or getattr(exc, "code", None)
+        if isinstance(status, int) and 400 <= status < 600:
+            if status not in _RETRYABLE_STATUS:
+                return False, None
+            response = getattr(exc, "response", None)
+            return True, _parse_retry_after(getattr(response, "headers", None))
+        exc = exc.__cause__ or exc.__context__
+    # No HTTP status (e.g. connection errors): retry with backoff as before
+    return True, None
+
+def _parse_retry_after(headers: Any) -> Optional[float]:
+    """
+    Read the retry delay from retry-after-ms or Retry-After response headers
+    
+    Args:
+        headers: Response headers, or None
+        
+    Returns:
+        Delay in seconds, capped at _MAX_RETRY_AFTER, or None if absent or invalid
+    """
+    if not headers:
+        return None
+    try:
+        value = headers.get("retry-after-ms")
+        if value is not None:
+            return min(float(value) / 1000, _MAX_RETRY_AFTER)
+        value = headers.get("retry-after")
+        if value is None:
+            return None
+        try:
+            return min(float(value), _MAX_RETRY_AFTER)
+        except ValueError:
+            # HTTP-date form
+            retry_at = parsedate_to_datetime(value)
+            return min(max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0), _MAX_RETRY_AFTER)
+    except (TypeError, ValueError):
+        return None
+
+@lru_cache(maxsize=None)
+def _load_provider(provider_name: str) -> ModuleType:
+    """
+    Import an LLM provider module on first use, so each SDK is only loaded
+    once a model from that provider is actually called
+    
+    Args:
+        provider_name: Provider module name in atoms.llm_providers
+        
+    Returns:
+        The provider module
+        
+    Raises:
+        ValueError: If the provider cannot be imported
+    """
+    try:
+        return importlib.import_module(f"atoms.llm_providers.{provider_name}")
+    except ImportError as e:
+        logger.error("LLM provider %s not available. Make sure the atoms package is installed. Error: %s", provider_name, e)
+        raise ValueError("LLM providers not available. Make sure the atoms package is installed.") from e
+
+@lru_cache(maxsize=128)
+def _resolve_provider(model_name: str) -> ModuleType:
+    """
+    Resolve the provider module that serves a model name
+    
+    Args:
+        model_name: Name of the model to call
+        
+    Returns:
+        The atoms.llm_providers module for the model
+        
+    Raises:
+        ValueError: If model is not supported
+    """
+    provider_name, _, _ = parse_model_name(model_name)
+    if provider_name is None:
+        raise ValueError(f"Unsupported model: {model_name}")
+    return _load_provider(provider_name)
+
+async def call_model_with_retry(
+    model_name: str,
+    prompt: str,
+    is_ceo: bool = False,
+    max_retries: int = None,
+    max_output_tokens: Optional[int] = None,
+) -> str:
     """
     Call an LLM model with the given prompt, with retry logic
     
+    Concurrent calls with the same model, role and prompt share a single
+    underlying call and all receive its result (or its exception). The shared
+    call is cancelled once every caller waiting on it has been cancelled.
+    
     Args:
         model_name: Name of the model to call
         prompt: XML prompt to send to the model
         is_ceo: Whether this model is being used as the CEO model
         max_retries: Maximum number of retries (defaults to settings.max_retries)
+        max_output_tokens: Output token budget (defaults to the provider's)
         
     Returns:
         Model response text
@@ -45,42 +191,63 @@ async def call_model_with_retry(model_name: str, prompt: str, is_ceo: bool = Fal
         ModelCallRetryError: If all retries fail
     """
     if max_retries is None:
-        max_retries = settings.max_retries
+        max_retries = MAX_RETRIES
         
     if not validate_model_name(model_name):
         raise ValueError(f"Unsupported model: {model_name}")
     
+    key = make_cache_key(model_name, is_ceo, prompt, max_output_tokens)
+    if key in _inflight_calls:
+        logger.info("Joining in-flight call to model: %s", model_name)
+    
+    return await _inflight_calls.run(
+        key, lambda: _call_model_with_retry(model_name, prompt, is_ceo, max_retries, max_output_tokens)
+    )
+
+async def _call_model_with_retry(
+    model_name: str, prompt: str, is_ceo: bool, max_retries: int, max_output_tokens: Optional[int]
+) -> str:
+    """
+    Retry loop behind call_model_with_retry
+    
+    Raises:
+        ModelCallRetryError: If all retries fail
+    """
     retry_count = 0
-    last_error = None
     
-    # Exponential backoff parameters
-    base_delay = 1  # seconds
-    max_delay = 32  # seconds
+    provider_name, _, _ = parse_model_name(model_name)
+    semaphore = _get_provider_semaphore(provider_name)
     
-    while retry_count <= max_retries:
+    while True:
         try:
-            return await call_model(model_name, prompt, is_ceo)
+            # Hold a slot only for the call itself, not while backing off
+            async with semaphore:
+                return await call_model(model_name, prompt, is_ceo, max_output_tokens=max_output_tokens)
         except Exception as e:
-            last_error = e
-            retry_count += 1
+            retryable, retry_after = _classify_error(e)
+            if not retryable:
+                error_msg = f"Failed to call model {model_name}: {str(e)} (not retryable)"
+                logger.error(error_msg)
+                raise ModelCallRetryError(error_msg) from e
             
+            retry_count += 1
             if retry_count > max_retries:
-                logger.error(f"Failed to call model {model_name} after {max_retries} retries")
-                break
+                error_msg = f"Failed to call model {model_name} after {max_retries} retries: {str(e)}"
+                logger.error(error_msg)
+                raise ModelCallRetryError(error_msg) from e
                 
-            # Calculate delay with exponential backoff and jitter
-            delay = min(base_delay * (2 ** (retry_count - 1)), max_delay)
-            delay = delay * (0.5 + 0.5 * random.random())  # Add jitter
+            if retry_after is not None:
+                # Wait as long as the provider asked, plus a little jitter
+                delay = retry_after + _rand()
+            else:
+                # Full jitter: sleep a uniform random time up to the exponential backoff cap,
+                # so board calls that failed together do not retry in lockstep
+                delay = _BACKOFF_TABLE[min(retry_count, len(_BACKOFF_TABLE)) - 1] * _rand()
             
-            logger.warning(f"Call to model {model_name} failed. Retrying in {delay:.2f} seconds... ({retry_count}/{max_retries})")
+            logger.warning("Call to model %s failed. Retrying in %.2f seconds... (%d/%d)", model_name, delay, retry_count, max_retries)
             await asyncio.sleep(delay)
-    
-    # If we get here, all retries have failed
-    error_msg = f"Failed to call model {model_name} after {max_retries} retries: {str(last_error)}"
-    logger.error(error_msg)
-    raise ModelCallRetryError(error_msg)
 
-async def call_model(model_name: str, prompt: str, is_ceo: bool = False) -> str:
+async def call_model(model_name: str, prompt: str, is_ceo: bool = False, max_output_tokens: Optional[int] = None) -> str:
     """
     Call an LLM model with the given prompt.
     
@@ -88,6 +255,7 @@ async def call_model(model_name: str, prompt: str, is_ceo: bool = False) -> str:
         model_name: Name of the model to call (e.g., "gpt-4o", "claude-3.5-sonnet", "gemini-1.5-pro")
         prompt: XML prompt to send to the model
         is_ceo: Whether this model is being used as the CEO model (affects system prompt)
+        max_output_tokens: Output token budget (defaults to the provider's)
         
     Returns:
         Model response text
@@ -96,85 +264,78 @@ async def call_model(model_name: str, prompt: str, is_ceo: bool = False) -> str:
         ValueError: If API keys are not set or model is unsupported
         HTTPException: If API call fails
     """
-    logger.info(f"Calling model: {model_name}" + (" as CEO" if is_ceo else " as board member"))
-    
-    if not LLM_PROVIDERS_AVAILABLE:
-        raise ValueError("LLM providers not available. Make sure the atoms package is installed.")
+    logger.info("Calling model: %s as %s", model_name, "CEO" if is_ceo else "board member")
     
     try:
-        # Set the appropriate system prompt based on role
-        if is_ceo:
-            system_prompt = "You are the CEO making a final decision based on board member recommendations."
-        else:
-            system_prompt = "You are a board member providing a detailed analysis."
-            
-        # Use OpenAI provider for gpt-*, o3*, o4* models
-        if model_name.startswith(("gpt-", "o3", "o4")):
-            logger.info(f"Using OpenAI provider for model: {model_name}")
-            
-            full_prompt = f"{system_prompt}\n\n{prompt}"
-            
-            # Call OpenAI provider synchronously - converting to async pattern
-            result = await asyncio.to_thread(openai.prompt, full_prompt, model_name)
-            return result
-                
-        # Use Anthropic provider for claude-* models
-        elif model_name.startswith("claude-"):
-            logger.info(f"Using Anthropic provider for model: {model_name}")
-            
-            full_prompt = f"{system_prompt}\n\n{prompt}"
-            
-            # Call Anthropic provider synchronously - converting to async pattern
-            result = await asyncio.to_thread(anthropic.prompt, full_prompt, model_name)
-            return result
-            
-        # Use Gemini provider for gemini-* models
-        elif model_name.startswith("gemini-"):
-            logger.info(f"Using Gemini provider for model: {model_name}")
-            
-            full_prompt = f"{system_prompt}\n\n{prompt}"
-            
-            # Call Gemini provider synchronously - converting to async pattern
-            result = await asyncio.to_thread(gemini.prompt, full_prompt, model_name)
-            return result
-        else:
-            raise ValueError(f"Unsupported model: {model_name}")
+        provider = _resolve_provider(model_name)
+        logger.info("Using %s provider for model: %s", provider.__name__, model_name)
+        
+        # Serve repeated (model, role, prompt, budget) calls from the response cache
+        cache = get_llm_cache()
+        if cache is not None:
+            cache_key = make_cache_key(model_name, is_ceo, prompt, max_output_tokens)
+            cached = await cache.get(cache_key)
+            if cached is not None:
+                logger.info("Cache hit for model: %s", model_name)
+                return cached
+        
+        # Select the system prompt based on role
+        system = _CEO_SYSTEM_PROMPT if is_ceo else _BOARD_SYSTEM_PROMPT
+        
+        # Call the provider's native async client on the event loop
+        result = await provider.aprompt(prompt, model_name, system=system, max_output_tokens=max_output_tokens)
+        
+        if cache is not None:
+            await cache.set(cache_key, result, settings.cache_ttl)
+        return result
     
     except Exception as e:
-        logger.error(f"Error calling model {model_name}: {str(e)}")
+        logger.error("Error calling model %s: %s", model_name, e)
         raise
 
-async def process_board_responses(models: List[str], board_prompt: str) -> List[Dict[str, str]]:
+async def process_board_responses(
+    models: List[str], board_prompt: str, max_output_tokens: Optional[int] = None
+) -> List[Dict[str, str]]:
     """
     Process board responses in parallel.
     
     Args:
         models: List of model names to call
         board_prompt: Prompt to send to each model
+        max_output_tokens: Output token budget for each call (defaults to the provider's)
         
     Returns:
         List of model responses
     """
     # Fan-out: Make parallel LLM calls to all board models
-    board_tasks = [call_model_with_retry(model, board_prompt, is_ceo=False) for model in models]
+    board_tasks = [
+        asyncio.ensure_future(call_model_with_retry(model, board_prompt, is_ceo=False, max_output_tokens=max_output_tokens))
+        for model in models
+    ]
     
     try:
         board_results = await asyncio.gather(*board_tasks)
     except Exception as e:
-        logger.error(f"Error in parallel model calls: {str(e)}")
+        # Cancel the remaining calls instead of letting them run (and spend
+        # tokens) for a decision that has already failed
+        for task in board_tasks:
+            task.cancel()
+        logger.error("Error in parallel model calls: %s", e)
         raise HTTPException(status_code=500, detail=f"Error in parallel model calls: {str(e)}")
     
     # Format results
-    formatted_results = []
-    for model, response in zip(models, board_results):
-        formatted_results.append({
-            "model_name": model,
-            "response": response
-        })
-    
-    return formatted_results
+    return [
+        {"model_name": model, "response": response}
+        for model, response in zip(models, board_results)
+    ]
 
-async def generate_board_decisions(board_models: List[str], purpose: str, factors: str, resources: str) -> List[Dict[str, str]]:
+async def generate_board_decisions(
+    board_models: List[str],
+    purpose: str,
+    factors: str,
+    resources: str,
+    max_output_tokens: Optional[int] = None,
+) -> List[Dict[str, str]]:
     """
     Generate board decisions by calling all board models in parallel.
     
@@ -183,6 +344,7 @@ async def generate_board_decisions(board_models: List[str], purpose: str, factor
         purpose: The purpose text
         factors: The factors text
         resources: The decision resources text
+        max_output_tokens: Output token budget for each board call (defaults to the provider's)
         
     Returns:
         List of board model responses
@@ -191,10 +353,16 @@ async def generate_board_decisions(board_models: List[str], purpose: str, factor
     board_prompt = construct_board_prompt(purpose, factors, resources)
     
     # Process board responses in parallel
-    logger.info(f"Generating decisions from {len(board_models)} board models")
-    return await process_board_responses(board_models, board_prompt)
+    logger.info("Generating decisions from %d board models", len(board_models))
+    return await process_board_responses(board_models, board_prompt, max_output_tokens)
 
-async def generate_ceo_decision(ceo_model: str, purpose: str, factors: str, board_responses: List[Dict[str, str]]) -> str:
+async def generate_ceo_decision(
+    ceo_model: str,
+    purpose: str,
+    factors: str,
+    board_responses: List[Dict[str, str]],
+    max_output_tokens: Optional[int] = None,
+) -> str:
     """
     Generate CEO decision based on board responses.
     
@@ -203,6 +371,7 @@ async def generate_ceo_decision(ceo_model: str, purpose: str, factors: str, boar
         purpose: The purpose text
         factors: The factors text
         board_responses: List of board model responses
+        max_output_tokens: Output token budget for the CEO call (defaults to the provider's)
         
     Returns:
         CEO decision text
@@ -211,30 +380,69 @@ async def generate_ceo_decision(ceo_model: str, purpose: str, factors: str, boar
     ceo_prompt = construct_ceo_prompt(purpose, factors, board_responses)
     
     # Call CEO model with retry
-    logger.info(f"Generating CEO decision using {ceo_model}")
-    return await call_model_with_retry(ceo_model, ceo_prompt, is_ceo=True)
+    logger.info("Generating CEO decision using %s", ceo_model)
+    return await call_model_with_retry(ceo_model, ceo_prompt, is_ceo=True, max_output_tokens=max_output_tokens)
+
+async def warm_up_providers() -> None:
+    """
+    Open connections to every provider with a configured API key, so the first
+    decision does not pay for the TCP/TLS handshakes
+    
+    Warm-up failures are logged by the providers and never raised.
+    """
+    api_keys = {
+        "openai": settings.openai_api_key,
+        "anthropic": settings.anthropic_api_key,
+        "gemini": settings.gemini_api_key,
+    }
+    
+    async def _warm(provider_name: str) -> None:
+        try:
+            await _load_provider(provider_name).awarmup()
+        except Exception as e:
+            logger.warning("Could not warm up %s provider: %s", provider_name, e)
+    
+    await asyncio.gather(*(_warm(name) for name, key in api_keys.items() if key))
 
 def list_available_models() -> Dict[str, List[str]]:
     """
     List all available models from all providers
     
+    The catalogs are fetched from the three providers in parallel and cached
+    for settings.model_list_ttl seconds. A provider whose catalog cannot be
+    fetched contributes its hardcoded fallback list, or an empty list if it
+    raised, and the result is not cached, so the next call tries again.
+    
     Returns:
         Dictionary with provider names as keys and lists of model names as values
     """
-    if not LLM_PROVIDERS_AVAILABLE:
-        logger.warning("LLM providers not available. Returning empty model list.")
-        return {"openai": [], "anthropic": [], "gemini": []}
+    if _model_list_cache["data"] is not None and time.monotonic() < _model_list_cache["expiry"]:
+        return _model_list_cache["data"]
     
-    try:
-        openai_models = openai.list_models()
-        anthropic_models = anthropic.list_models()
-        gemini_models = gemini.list_models()
-        
-        return {
-            "openai": openai_models,
-            "anthropic": anthropic_models,
-            "gemini": gemini_models
-        }
-    except Exception as e:
-        logger.error(f"Error listing available models: {str(e)}")
-        return {"openai": [], "anthropic": [], "gemini": []}
\ No newline at end of file
+    providers = ("openai", "anthropic", "gemini")
+    
+    def _list(provider_name: str) -> List[str]:
+        return _load_provider(provider_name).list_models()
+    
+    # list_models uses the blocking SDK clients; query the providers from one thread each
+    with ThreadPoolExecutor(max_workers=len(providers)) as executor:
+        futures = {name: executor.submit(_list, name) for name in providers}
+    
+    models: Dict[str, List[str]] = {}
+    failed = False
+    for provider_name, future in futures.items():
+        try:
+            models[provider_name] = future.result()
+        except Exception as e:
+            logger.error("Error listing available models for %s: %s", provider_name, e)
+            models[provider_name] = []
+            failed = True
+        else:
+            # A fallback list stands in for a catalog request that failed
+            failed = failed or isinstance(models[provider_name], FallbackModelList)
+    
+    # Only cache complete results, so a transient failure is retried on the next call
+    if not failed:
+        _model_list_cache["data"] = models
+        _model_list_cache["expiry"] = time.monotonic() + settings.model_list_ttl
+    return models
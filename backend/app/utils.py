@@ -1,20 +1,72 @@
-import os
-import xml.etree.ElementTree as ET
-from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
+import hashlib
+import re
+from functools import lru_cache
+from lxml import etree as ET
+from xml.sax.saxutils import escape as xml_escape
+from typing import List, Dict, Any, Optional, Tuple, Union
 import logging
 
+from cachetools import LRUCache
+
+from atoms.llm_providers import PROVIDER_PREFIXES
+
 # Setup logging
 logger = logging.getLogger(__name__)
 
-def parse_xml_input(xml_content: str) -> Tuple[str, str, str, List[str], Optional[str]]:
+# Shared parser for request XML: no entity expansion, no network access and
+# no huge-tree mode, so untrusted input cannot trigger XXE or billion-laughs.
+# Request XML never uses xml:id lookups, so skip building the ID table too.
+_XML_PARSER = ET.XMLParser(
+    encoding="utf-8",
+    resolve_entities=False,
+    no_network=True,
+    huge_tree=False,
+    collect_ids=False,
+)
+
+def _provider_pattern() -> "re.Pattern[str]":
+    """
+    Compile atoms.llm_providers.PROVIDER_PREFIXES into one regex with a named group per provider
+    """
+    prefixes: Dict[str, List[str]] = {}
+    for prefix, provider_name in PROVIDER_PREFIXES:
+        prefixes.setdefault(provider_name, []).append(re.escape(prefix))
+    return re.compile("|".join(f"(?P<{name}>{'|'.join(group)})" for name, group in prefixes.items()))
+
+# Model name prefixes, one named group per provider (group name = provider)
+_PROVIDER_RE = _provider_pattern()
+
+# Top-level elements parse_xml_input reads; the first of each is used
+_REQUEST_TAGS = ("purpose", "factors", "decision-resources", "board-models", "models", "ceo-model")
+
+# Parsed requests keyed by BLAKE2b-128 digest of the request XML
+_parse_cache: LRUCache = LRUCache(maxsize=1024)
+
+def _leading_text(elem: Optional[Any]) -> str:
+    """
+    Return the stripped text before an element's first child, or "" if absent
+    """
+    if elem is None or elem.text is None:
+        return ""
+    return elem.text.strip()
+
+def _model_names(models_elem: Any) -> Tuple[str, ...]:
+    """
+    Return the non-empty name attributes of a models element's <model> children
+    """
+    return tuple(name for name in (model.get("name") for model in models_elem.iterchildren("model")) if name)
+
+def parse_xml_input(xml_content: Union[str, bytes]) -> Tuple[str, str, str, List[str], Optional[str]]:
     """
     Parse XML input to extract purpose, factors, resources, board models, and CEO model.
     
-    XML format uses <board-models> and <ceo-model> elements.
+    XML format uses <board-models> and <ceo-model> elements. Results are cached
+    by content, so a resubmitted payload is not parsed again.
     
     Args:
-        xml_content: XML string containing decision request
+        xml_content: XML string (or UTF-8 bytes) containing decision request. Callers
+            that already hold the raw bytes should pass them directly, which skips
+            the encode step.
         
     Returns:
         Tuple of (purpose, factors, resources, board_models, ceo_model)
@@ -23,66 +75,57 @@ def parse_xml_input(xml_content: str) -> Tuple[str, str, str, List[str], Optiona
         ET.ParseError: If XML is malformed
         ValueError: If required elements are missing
     """
+    xml_bytes = xml_content.encode("utf-8") if isinstance(xml_content, str) else xml_content
+    # Key on a digest so the cache never holds on to request bodies
+    key = hashlib.blake2b(xml_bytes, digest_size=16).digest()
+    result = _parse_cache.get(key)
+    if result is None:
+        result = _parse_cache[key] = _parse_xml_bytes(xml_bytes)
+    purpose, factors, resources, board_models, ceo_model = result
+    # The cached result is shared, so give each caller its own list
+    return purpose, factors, resources, list(board_models), ceo_model
+
+def _parse_xml_bytes(xml_bytes: bytes) -> Tuple[str, str, str, Tuple[str, ...], Optional[str]]:
+    """
+    Parse UTF-8 request XML for parse_xml_input
+    
+    Board models are returned as a tuple so the cached result stays immutable.
+    Errors raise before anything is cached.
+    """
     try:
         # Wrap the content in a root element if it doesn't have one
-        if not xml_content.strip().startswith("<?xml") and not xml_content.strip().startswith("<root"):
-            wrapped_xml = f"<root>{xml_content}</root>"
-        else:
-            wrapped_xml = xml_content
+        if not xml_bytes.lstrip().startswith((b"<?xml", b"<root")):
+            xml_bytes = b"<root>" + xml_bytes + b"</root>"
             
-        root = ET.fromstring(wrapped_xml)
-        
-        # If we wrapped the XML, the actual elements will be children of root
-        if root.tag == "root":
-            elements = root
-        else:
-            elements = root
-        
-        # Extract purpose
-        purpose_elem = elements.find('purpose')
-        purpose = purpose_elem.text.strip() if purpose_elem is not None and purpose_elem.text else ""
-        
-        # Extract factors
-        factors_elem = elements.find('factors')
-        factors = factors_elem.text.strip() if factors_elem is not None and factors_elem.text else ""
+        root = ET.fromstring(xml_bytes, _XML_PARSER)
         
-        # Extract decision resources
-        resources_elem = elements.find('decision-resources')
-        resources = resources_elem.text.strip() if resources_elem is not None and resources_elem.text else ""
+        # The schema is fixed, so one pass over the root's children collects
+        # every element needed
+        elems: Dict[Any, Any] = {}
+        for child in root.iterchildren(*_REQUEST_TAGS):
+            elems.setdefault(child.tag, child)
         
-        # Parse board models and CEO model
-        board_models = []
-        ceo_model = None
+        purpose = _leading_text(elems.get("purpose"))
+        factors = _leading_text(elems.get("factors"))
+        resources = _leading_text(elems.get("decision-resources"))
         
         # Parse board models - try both new format (board-models) and legacy format (models)
-        board_models_elem = elements.find('board-models')
-        if board_models_elem is not None:
-            for model_elem in board_models_elem.findall('model'):
-                model_name = model_elem.get('name')
-                if model_name:
-                    board_models.append(model_name)
+        ceo_model = None
+        if "board-models" in elems:
+            board_models = _model_names(elems["board-models"])
+        elif "models" in elems:
+            legacy_models = elems["models"]
+            board_models = _model_names(legacy_models)
+            # The last named model with ceo="true" is the CEO model
+            for model in legacy_models.iterchildren("model"):
+                if model.get("ceo") == "true" and model.get("name"):
+                    ceo_model = model.get("name")
         else:
-            # Try legacy format with <models> element
-            models_elem = elements.find('models')
-            if models_elem is not None:
-                ceo_attr_model = None
-                for model_elem in models_elem.findall('model'):
-                    model_name = model_elem.get('name')
-                    if model_name:
-                        board_models.append(model_name)
-                        # Check if this model has ceo="true" attribute
-                        if model_elem.get('ceo') == "true" and ceo_model is None:
-                            ceo_attr_model = model_name
-                # If we found a model with ceo="true", set it as the CEO model
-                if ceo_attr_model is not None:
-                    ceo_model = ceo_attr_model
-            else:
-                raise ValueError("Missing required <board-models> or <models> element in XML")
+            raise ValueError("Missing required <board-models> or <models> element in XML")
         
         # Parse CEO model
-        ceo_model_elem = elements.find('ceo-model')
-        if ceo_model_elem is not None:
-            ceo_model = ceo_model_elem.get('name')
+        if "ceo-model" in elems:
+            ceo_model = elems["ceo-model"].get('name')
         
         # Validate we have at least one model
         if not board_models:
@@ -97,6 +140,7 @@ def parse_xml_input(xml_content: str) -> Tuple[str, str, str, List[str], Optiona
         logger.error(f"Error parsing XML input: {str(e)}")
         raise ValueError(f"Error parsing XML input: {str(e)}")
 
+@lru_cache(maxsize=256)
 def validate_model_name(model_name: str) -> bool:
     """
     Validate if a model name is supported
@@ -112,25 +156,7 @@ def validate_model_name(model_name: str) -> bool:
     # Anthropic models include claude-* with or without thinking suffix (:1k, :4k, :16k or specific numbers)
     # Gemini models include gemini-* with or without thinking suffix (:1k, :4k, etc.)
     
-    # Check for OpenAI models
-    if model_name.startswith(("gpt-", "o3", "o4")):
-        # Strip any reasoning suffix if present
-        base_model = model_name.split(":")[0] 
-        return True
-    
-    # Check for Anthropic models
-    if model_name.startswith("claude-"):
-        # Strip any thinking suffix if present
-        base_model = model_name.split(":")[0]
-        return True
-    
-    # Check for Gemini models
-    if model_name.startswith("gemini-"):
-        # Strip any thinking suffix if present
-        base_model = model_name.split(":")[0]
-        return True
-    
-    return False
+    return _PROVIDER_RE.match(model_name) is not None
 
 def construct_board_prompt(purpose: str, factors: str, resources: str) -> str:
     """
@@ -150,30 +176,9 @@ def construct_board_prompt(purpose: str, factors: str, resources: str) -> str:
 <decision-resources>{resources}</decision-resources>
 """
 
-def construct_ceo_prompt(purpose: str, factors: str, board_responses: List[Dict[str, str]]) -> str:
-    """
-    Construct the CEO prompt with board responses.
-    
-    Args:
-        purpose: The purpose text
-        factors: The factors text
-        board_responses: List of dictionaries with model_name and response
-        
-    Returns:
-        CEO prompt XML
-    """
-    original_question = f"{purpose}\n\n{factors}"
-    
-    board_decisions_xml = ""
-    for response in board_responses:
-        board_decisions_xml += f"""
-    <board-response>
-        <model-name>{response['model_name']}</model-name>
-        <response>{response['response']}</response>
-    </board-response>
-"""
-    
-    ceo_prompt = f"""
+# Static start of the CEO prompt, built once; the per-request question and
+# board responses follow it
+_CEO_PROMPT_HEADER = """
 <purpose>
     You are a CEO of a company. You are given a list of responses from your board of directors. Your job is to take in the original question prompt, and each of the board members' responses, and choose the best direction for your company.
 </purpose>
@@ -185,28 +190,50 @@ def construct_ceo_prompt(purpose: str, factors: str, board_responses: List[Dict[
     <instruction>As a CEO, you breakdown the decision into several categories including: risk, reward, timeline, and resources. In addition to these guiding categories, you also consider the board members' expertise and experience. As a bleeding edge CEO, you also invent new dimensions of decision making to help you make the best decision for your company.</instruction>
     <instruction>Your final CEO response should be in markdown format with a comprehensive explanation of your decision. Start the top of the file with a title that says "CEO Decision", include a table of contents, briefly describe the question/problem at hand then dive into several sections. One of your first sections should be a quick summary of your decision, then breakdown each of the boards decisions into sections with your commentary on each. Where we lead into your decision with the categories of your decision making process, and then we lead into your final decision.</instruction>
 </instructions>
-<original-question>{original_question}</original-question>
-<board-decisions>
-{board_decisions_xml}
-</board-decisions>
 """
-    
-    return ceo_prompt
 
-def ensure_output_directory(base_dir: str, decision_id: str) -> Path:
+# One <board-response> entry in the CEO prompt
+_BOARD_RESPONSE_TEMPLATE = """
+    <board-response>
+        <model-name>{model_name}</model-name>
+        <response>{response}</response>
+    </board-response>
+"""
+
+def construct_ceo_prompt(purpose: str, factors: str, board_responses: List[Dict[str, str]]) -> str:
     """
-    Ensure the output directory exists for a given decision ID
+    Construct the CEO prompt with board responses.
     
     Args:
-        base_dir: Base output directory
-        decision_id: Unique decision ID
+        purpose: The purpose text
+        factors: The factors text
+        board_responses: List of dictionaries with model_name and response
         
     Returns:
-        Path object for the decision directory
+        CEO prompt XML
     """
-    output_dir = Path(base_dir) / decision_id
-    output_dir.mkdir(parents=True, exist_ok=True)
-    return output_dir
+    original_question = f"{purpose}\n\n{factors}"
+    
+    # Model output is escaped so stray "<" or "&" cannot break the XML structure
+    board_decisions_xml = "".join(
+        _BOARD_RESPONSE_TEMPLATE.format(model_name=response['model_name'], response=xml_escape(response['response']))
+        for response in board_responses
+    )
+    
+    return "".join((
+        _CEO_PROMPT_HEADER,
+        "<original-question>", original_question, "</original-question>\n",
+        "<board-decisions>\n", board_decisions_xml, "\n</board-decisions>\n",
+    ))
+
+# Translation table for sanitize_xml, mapping XML special characters to entities
+_XML_ESCAPE_TABLE = str.maketrans({
+    '&': '&amp;',
+    '<': '&lt;',
+    '>': '&gt;',
+    '"': '&quot;',
+    "'": '&apos;',
+})
 
 def sanitize_xml(xml_content: str) -> str:
     """
@@ -218,16 +245,10 @@ def sanitize_xml(xml_content: str) -> str:
     Returns:
         Sanitized XML content
     """
-    # Replace XML special characters
-    sanitized = (xml_content
-                .replace('&', '&amp;')
-                .replace('<', '&lt;')
-                .replace('>', '&gt;')
-                .replace('"', '&quot;')
-                .replace("'", '&apos;'))
-    
-    return sanitized
+    # Replace XML special characters in a single pass
+    return xml_content.translate(_XML_ESCAPE_TABLE)
 
+@lru_cache(maxsize=256)
 def parse_model_name(model_name: str) -> Tuple[Optional[str], str, Optional[str]]:
     """
     Parse a model name to extract provider, base name, and any suffix
@@ -242,18 +263,12 @@ def parse_model_name(model_name: str) -> Tuple[Optional[str], str, Optional[str]
         suffix: Any suffix (:low, :medium, :high, :1k, :4k, etc.) or None
     """
     # Extract suffix if present
-    parts = model_name.split(":", 1)
-    base_name = parts[0]
-    suffix = parts[1] if len(parts) > 1 else None
+    base_name, sep, suffix = model_name.partition(":")
+    if not sep:
+        suffix = None
     
-    # Determine provider
-    if base_name.startswith(("gpt-", "o3", "o4")):
-        provider = "openai"
-    elif base_name.startswith("claude-"):
-        provider = "anthropic"
-    elif base_name.startswith("gemini-"):
-        provider = "gemini"
-    else:
-        provider = None
+    # Determine provider from the name of the matching prefix group
+    match = _PROVIDER_RE.match(base_name)
+    provider = match.lastgroup if match else None
         
     return provider, base_name, suffix
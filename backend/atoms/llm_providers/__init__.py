@@ -1 +1,88 @@
-# LLM Providers package - interfaces for various LLM APIs
\ No newline at end of file
+# LLM Providers package - interfaces for various LLM APIs
+
+import asyncio
+import hashlib
+import importlib
+from types import ModuleType
+from typing import List, Sequence, Tuple
+
+from dotenv import load_dotenv
+
+from .singleflight import SingleFlight
+
+# Load environment variables once for every provider module
+load_dotenv()
+
+# Model name prefix -> provider module; app.utils derives its model name
+# validation from this table too
+PROVIDER_PREFIXES = (
+    ("gpt-", "openai"),
+    ("o3", "openai"),
+    ("o4", "openai"),
+    ("claude-", "anthropic"),
+    ("gemini-", "gemini"),
+)
+
+
+class FallbackModelList(list):
+    """
+    Hardcoded model list a provider's list_models() returns when its catalog
+    cannot be fetched, so callers can tell it apart from a live catalog.
+    """
+
+
+# In-flight aprompt calls keyed by (provider, model, BLAKE2b digest of text), so
+# identical concurrent prompts share one request
+_inflight = SingleFlight()
+
+
+def _provider_for(model: str) -> ModuleType:
+    """
+    Return the provider module serving a model, importing it on first use.
+
+    Raises:
+        ValueError: If no provider serves the model
+    """
+    for prefix, provider_name in PROVIDER_PREFIXES:
+        if model.startswith(prefix):
+            return importlib.import_module(f"{__name__}.{provider_name}")
+    raise ValueError(f"Unsupported model: {model}")
+
+
+async def _bounded_aprompt(provider: ModuleType, text: str, model: str, semaphore: asyncio.Semaphore) -> str:
+    """
+    Call provider.aprompt while holding a concurrency slot.
+    """
+    async with semaphore:
+        return await provider.aprompt(text, model)
+
+
+async def _aprompt_shared(text: str, model: str, semaphore: asyncio.Semaphore) -> str:
+    """
+    Await the in-flight aprompt call for (model, text), starting one if needed.
+
+    Only a newly started call takes a slot from the semaphore; joining an
+    in-flight call does not.
+    """
+    provider = _provider_for(model)
+    key = (provider.__name__, model, hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest())
+    return await _inflight.run(key, lambda: _bounded_aprompt(provider, text, model, semaphore))
+
+
+async def aprompt_many(items: Sequence[Tuple[str, str]], concurrency: int = 8) -> List[str]:
+    """
+    Send many prompts concurrently, with at most `concurrency` calls in flight.
+
+    Identical (text, model) pairs, in this batch or already in flight from
+    another caller, share a single provider call, which is cancelled once
+    every caller waiting on it has been cancelled.
+
+    Args:
+        items: (text, model) pairs; each model is routed to its provider by prefix
+        concurrency: Maximum number of concurrent provider calls
+
+    Returns:
+        Responses in the same order as items
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    return await asyncio.gather(*(_aprompt_shared(text, model, semaphore) for text, model in items))
@@ -3,55 +3,80 @@ Anthropic provider implementation.
 """
 
 import os
-import re
+import time
 import anthropic
-from typing import List, Tuple
+import httpx
+from typing import Any, Dict, List, Optional, Tuple
 import logging
-from dotenv import load_dotenv
+from functools import lru_cache
 
-# Load environment variables
-load_dotenv()
+from . import FallbackModelList
+from .http_client import get_async_http_client, get_http_client, loop_local
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Initialize Anthropic client
-client = anthropic.Anthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"))
+# Default output token budgets when the caller passes none: the whole budget
+# for plain prompts, and the room left for the answer on top of the thinking
+# budget for thinking prompts
+DEFAULT_MAX_OUTPUT_TOKENS = 1024
+DEFAULT_THINKING_OUTPUT_TOKENS = 1000
 
+def _get_client() -> anthropic.Anthropic:
+    """
+    Return the shared Anthropic client, created on first use
+    """
+    return _client_for(get_http_client())
 
-def parse_thinking_suffix(model: str) -> Tuple[str, int]:
+
+@lru_cache(maxsize=1)
+def _client_for(pool: httpx.Client) -> anthropic.Anthropic:
     """
-    Parse a model name to check for thinking token budget suffixes.
-    Only works with the claude-3-7-sonnet-20250219 model.
-    
-    Supported formats:
-    - model:1k, model:4k, model:16k
-    - model:1000, model:1054, model:1333, etc. (any value between 1024-16000)
+    Build the Anthropic client on a pool; a replaced pool gets a new client
+    """
+    return anthropic.Anthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"), http_client=pool)
+
+
+def _get_async_client() -> anthropic.AsyncAnthropic:
+    """
+    Return the async Anthropic client for the running event loop, created on first use
+    """
+    return loop_local(
+        "anthropic",
+        lambda: anthropic.AsyncAnthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"), http_client=get_async_http_client()),
+    )
+
+
+@lru_cache(maxsize=256)
+def _parse_thinking_suffix(model: str) -> Tuple[str, int, Tuple[Tuple[int, str], ...]]:
+    """
+    Memoized parse behind parse_thinking_suffix
     
-    Args:
-        model: The model name potentially with a thinking suffix
-        
     Returns:
-        Tuple of (base_model_name, thinking_budget)
-        If no thinking suffix is found, thinking_budget will be 0
+        Tuple of (base_model_name, thinking_budget, log records), where the
+        log records are (level, message) pairs for the caller to emit
     """
-    # Look for patterns like ":1k", ":4k", ":16k" or ":1000", ":1054", etc.
-    pattern = r'^(.+?)(?::(\d+)k?)?$'
-    match = re.match(pattern, model)
+    notes: List[Tuple[int, str]] = []
+    
+    # No colon means no thinking suffix
+    if ":" not in model:
+        return model, 0, tuple(notes)
     
-    if not match:
-        return model, 0
+    # Split off a suffix like ":1k", ":4k", ":16k" or ":1000", ":1054", etc.
+    base_model, _, suffix = model.rpartition(":")
+    thinking_suffix = suffix[:-1] if suffix.endswith("k") else suffix
     
-    base_model = match.group(1)
-    thinking_suffix = match.group(2)
+    # Anything else after the last colon is part of the model name
+    if not base_model or not thinking_suffix.isdecimal():
+        base_model, thinking_suffix = model, None
     
     # Validate the model - only claude-3-7-sonnet-20250219 supports thinking
     if base_model != "claude-3-7-sonnet-20250219":
-        logger.warning(f"Model {base_model} does not support thinking, ignoring thinking suffix")
-        return base_model, 0
+        notes.append((logging.WARNING, f"Model {base_model} does not support thinking, ignoring thinking suffix"))
+        return base_model, 0, tuple(notes)
     
     if not thinking_suffix:
-        return model, 0
+        return model, 0, tuple(notes)
     
     # Convert to integer
     try:
@@ -62,20 +87,63 @@ def parse_thinking_suffix(model: str) -> Tuple[str, int]:
             
         # Adjust values outside the range
         if thinking_budget < 1024:
-            logger.warning(f"Thinking budget {thinking_budget} below minimum (1024), using 1024 instead")
+            notes.append((logging.WARNING, f"Thinking budget {thinking_budget} below minimum (1024), using 1024 instead"))
             thinking_budget = 1024
         elif thinking_budget > 16000:
-            logger.warning(f"Thinking budget {thinking_budget} above maximum (16000), using 16000 instead")
+            notes.append((logging.WARNING, f"Thinking budget {thinking_budget} above maximum (16000), using 16000 instead"))
             thinking_budget = 16000
             
-        logger.info(f"Using thinking budget of {thinking_budget} tokens for model {base_model}")
-        return base_model, thinking_budget
+        notes.append((logging.INFO, f"Using thinking budget of {thinking_budget} tokens for model {base_model}"))
+        return base_model, thinking_budget, tuple(notes)
     except ValueError:
-        logger.warning(f"Invalid thinking budget format: {thinking_suffix}, ignoring")
-        return base_model, 0
+        notes.append((logging.WARNING, f"Invalid thinking budget format: {thinking_suffix}, ignoring"))
+        return base_model, 0, tuple(notes)
 
 
-def prompt_with_thinking(text: str, model: str, thinking_budget: int) -> str:
+def parse_thinking_suffix(model: str) -> Tuple[str, int]:
+    """
+    Parse a model name to check for thinking token budget suffixes.
+    Only works with the claude-3-7-sonnet-20250219 model.
+    
+    Supported formats:
+    - model:1k, model:4k, model:16k
+    - model:1000, model:1054, model:1333, etc. (any value between 1024-16000)
+    
+    Args:
+        model: The model name potentially with a thinking suffix
+        
+    Returns:
+        Tuple of (base_model_name, thinking_budget)
+        If no thinking suffix is found, thinking_budget will be 0
+    """
+    base_model, thinking_budget, notes = _parse_thinking_suffix(model)
+    # Log on every call, including cache hits
+    for level, message in notes:
+        logger.log(level, message)
+    return base_model, thinking_budget
+
+
+def _max_tokens(thinking_budget: int, max_output_tokens: Optional[int] = None) -> int:
+    """
+    Compute the max_tokens value for a request
+    
+    With thinking enabled, max_tokens must be greater than the thinking budget:
+    https://docs.anthropic.com/en/docs/build-with-claude/extended-thinking#max-tokens-and-context-window-size
+    so the response budget is added on top of it.
+    
+    Args:
+        thinking_budget: The token budget for thinking, or 0 if thinking is disabled
+        max_output_tokens: Tokens allowed for the answer, or None for the defaults
+        
+    Returns:
+        The max_tokens value to send
+    """
+    if thinking_budget > 0:
+        return thinking_budget + (max_output_tokens or DEFAULT_THINKING_OUTPUT_TOKENS)
+    return max_output_tokens or DEFAULT_MAX_OUTPUT_TOKENS
+
+
+def prompt_with_thinking(text: str, model: str, thinking_budget: int, max_output_tokens: Optional[int] = None) -> str:
     """
     Send a prompt to Anthropic Claude with thinking enabled and get a response.
     
@@ -83,17 +151,17 @@ def prompt_with_thinking(text: str, model: str, thinking_budget: int) -> str:
         text: The prompt text
         model: The base model name (without thinking suffix)
         thinking_budget: The token budget for thinking
+        max_output_tokens: Tokens allowed for the answer on top of the thinking
+            budget; defaults to DEFAULT_THINKING_OUTPUT_TOKENS
         
     Returns:
         Response string from the model
     """
     try:
-        # Ensure max_tokens is greater than thinking_budget
-        # Documentation requires this: https://docs.anthropic.com/en/docs/build-with-claude/extended-thinking#max-tokens-and-context-window-size
-        max_tokens = thinking_budget + 1000  # Adding 1000 tokens for the response
+        max_tokens = _max_tokens(thinking_budget, max_output_tokens)
         
         logger.info(f"Sending prompt to Anthropic model {model} with thinking budget {thinking_budget}")
-        message = client.messages.create(
+        message = _get_client().messages.create(
             model=model,
             max_tokens=max_tokens,
             thinking={
@@ -105,18 +173,18 @@ def prompt_with_thinking(text: str, model: str, thinking_budget: int) -> str:
         
         # Extract the response from the message content
         # Filter out thinking blocks and only get text blocks
-        text_blocks = [block for block in message.content if block.type == "text"]
+        response_text = next((block.text for block in message.content if block.type == "text"), None)
         
-        if not text_blocks:
+        if response_text is None:
             raise ValueError("No text content found in response")
             
-        return text_blocks[0].text
+        return response_text
     except Exception as e:
         logger.error(f"Error sending prompt with thinking to Anthropic: {e}")
         raise ValueError(f"Failed to get response from Anthropic with thinking: {str(e)}")
 
 
-def prompt(text: str, model: str) -> str:
+def prompt(text: str, model: str, max_output_tokens: Optional[int] = None) -> str:
     """
     Send a prompt to Anthropic Claude and get a response.
     
@@ -125,6 +193,8 @@ def prompt(text: str, model: str) -> str:
     Args:
         text: The prompt text
         model: The model name, optionally with thinking suffix
+        max_output_tokens: Output token budget; defaults to DEFAULT_MAX_OUTPUT_TOKENS,
+            or to DEFAULT_THINKING_OUTPUT_TOKENS on top of a thinking budget
         
     Returns:
         Response string from the model
@@ -134,48 +204,191 @@ def prompt(text: str, model: str) -> str:
     
     # If thinking budget is specified, use prompt_with_thinking
     if thinking_budget > 0:
-        return prompt_with_thinking(text, base_model, thinking_budget)
+        return prompt_with_thinking(text, base_model, thinking_budget, max_output_tokens)
     
     # Otherwise, use regular prompt
     try:
         logger.info(f"Sending prompt to Anthropic model: {base_model}")
-        message = client.messages.create(
-            model=base_model, max_tokens=4096, messages=[{"role": "user", "content": text}]
+        message = _get_client().messages.create(
+            model=base_model,
+            max_tokens=_max_tokens(0, max_output_tokens),
+            messages=[{"role": "user", "content": text}]
         )
 
         # Extract the response from the message content
         # Get only text blocks
-        text_blocks = [block for block in message.content if block.type == "text"]
+        response_text = next((block.text for block in message.content if block.type == "text"), None)
+        
+        if response_text is None:
+            raise ValueError("No text content found in response")
+            
+        return response_text
+    except Exception as e:
+        logger.error(f"Error sending prompt to Anthropic: {e}")
+        raise ValueError(f"Failed to get response from Anthropic: {str(e)}")
+
+
+def _system_kwargs(system: Optional[str]) -> Dict[str, Any]:
+    """
+    Build the system parameter for messages.create
+    
+    The system prompt is sent as its own block marked with cache_control so the
+    static prefix can be served from Anthropic's prompt cache.
+    
+    Args:
+        system: The system prompt, or None
+        
+    Returns:
+        Keyword arguments to pass to messages.create
+    """
+    if not system:
+        return {}
+    return {"system": [{"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}]}
+
+
+async def aprompt_with_thinking(
+    text: str,
+    model: str,
+    thinking_budget: int,
+    system: Optional[str] = None,
+    max_output_tokens: Optional[int] = None,
+) -> str:
+    """
+    Async variant of prompt_with_thinking using the shared async client.
+    
+    Args:
+        text: The prompt text
+        model: The base model name (without thinking suffix)
+        thinking_budget: The token budget for thinking
+        system: Optional system prompt, sent separately from the user text
+        max_output_tokens: Tokens allowed for the answer on top of the thinking
+            budget; defaults to DEFAULT_THINKING_OUTPUT_TOKENS
+        
+    Returns:
+        Response string from the model
+    """
+    try:
+        max_tokens = _max_tokens(thinking_budget, max_output_tokens)
+        
+        logger.info(f"Sending prompt to Anthropic model {model} with thinking budget {thinking_budget}")
+        message = await _get_async_client().messages.create(
+            model=model,
+            max_tokens=max_tokens,
+            thinking={
+                "type": "enabled",
+                "budget_tokens": thinking_budget,
+            },
+            messages=[{"role": "user", "content": text}],
+            **_system_kwargs(system),
+        )
+        
+        response_text = next((block.text for block in message.content if block.type == "text"), None)
         
-        if not text_blocks:
+        if response_text is None:
             raise ValueError("No text content found in response")
             
-        return text_blocks[0].text
+        return response_text
+    except Exception as e:
+        logger.error(f"Error sending prompt with thinking to Anthropic: {e}")
+        raise ValueError(f"Failed to get response from Anthropic with thinking: {str(e)}")
+
+
+async def aprompt(text: str, model: str, system: Optional[str] = None, max_output_tokens: Optional[int] = None) -> str:
+    """
+    Async variant of prompt using the shared async client.
+    
+    Automatically handles thinking suffixes in the model name (e.g., claude-3-7-sonnet-20250219:4k)
+    
+    Args:
+        text: The prompt text
+        model: The model name, optionally with thinking suffix
+        system: Optional system prompt, sent separately from the user text
+        max_output_tokens: Output token budget; defaults to DEFAULT_MAX_OUTPUT_TOKENS,
+            or to DEFAULT_THINKING_OUTPUT_TOKENS on top of a thinking budget
+        
+    Returns:
+        Response string from the model
+    """
+    base_model, thinking_budget = parse_thinking_suffix(model)
+    
+    if thinking_budget > 0:
+        return await aprompt_with_thinking(text, base_model, thinking_budget, system, max_output_tokens)
+    
+    try:
+        logger.info(f"Sending prompt to Anthropic model: {base_model}")
+        message = await _get_async_client().messages.create(
+            model=base_model,
+            max_tokens=_max_tokens(0, max_output_tokens),
+            messages=[{"role": "user", "content": text}],
+            **_system_kwargs(system),
+        )
+
+        response_text = next((block.text for block in message.content if block.type == "text"), None)
+        
+        if response_text is None:
+            raise ValueError("No text content found in response")
+            
+        return response_text
     except Exception as e:
         logger.error(f"Error sending prompt to Anthropic: {e}")
         raise ValueError(f"Failed to get response from Anthropic: {str(e)}")
 
 
-def list_models() -> List[str]:
+async def awarmup() -> None:
+    """
+    Open a connection in the shared async pool ahead of the first real call.
+    
+    Lists models with the async client so the TCP/TLS handshake is done at
+    startup; the connection then stays in the keep-alive pool. Failures are
+    logged and otherwise ignored.
+    """
+    try:
+        await _get_async_client().models.list()
+        logger.info("Warmed up Anthropic client")
+    except Exception as e:
+        logger.warning(f"Anthropic warm-up failed: {e}")
+
+
+# Model catalog from the last successful list_models() call, with the
+# monotonic time it was fetched
+_models_cache: Optional[Tuple[float, List[str]]] = None
+MODELS_CACHE_TTL = 3600  # seconds
+
+# Returned by list_models() when the catalog cannot be fetched
+FALLBACK_MODELS = (
+    "claude-3-7-sonnet",
+    "claude-3-5-sonnet",
+    "claude-3-5-sonnet-20240620",
+    "claude-3-5-haiku",
+)
+
+
+def list_models(client: Optional[anthropic.Anthropic] = None) -> List[str]:
     """
     List available Anthropic models.
     
+    Results from the shared client are cached for MODELS_CACHE_TTL seconds. If
+    the catalog cannot be fetched, FALLBACK_MODELS is returned as a
+    FallbackModelList and not cached.
+    
+    Args:
+        client: Client to query instead of the shared one; bypasses the cache
+    
     Returns:
         List of model names
     """
+    global _models_cache
+    if client is None and _models_cache is not None and time.monotonic() - _models_cache[0] < MODELS_CACHE_TTL:
+        return list(_models_cache[1])
+    
     try:
         logger.info("Listing Anthropic models")
-        response = client.models.list()
-
-        models = [model.id for model in response.data]
-        return models
+        response = (client or _get_client()).models.list()
     except Exception as e:
         logger.error(f"Error listing Anthropic models: {e}")
-        # Return some known models if API fails
-        logger.info("Returning hardcoded list of known Anthropic models")
-        return [
-            "claude-3-7-sonnet",
-            "claude-3-5-sonnet",
-            "claude-3-5-sonnet-20240620",
-            "claude-3-5-haiku",
-        ]
\ No newline at end of file
+        return FallbackModelList(FALLBACK_MODELS)
+
+    models = [model.id for model in response.data]
+    if client is None:
+        _models_cache = (time.monotonic(), models)
+    return list(models)
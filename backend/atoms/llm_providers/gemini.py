@@ -3,49 +3,56 @@ Google Gemini provider implementation.
 """
 
 import os
-import re
-from typing import List, Tuple
+import time
+from typing import List, Optional, Tuple
 import logging
-from dotenv import load_dotenv
+from functools import lru_cache
 from google import genai
 
-# Load environment variables
-load_dotenv()
+from . import FallbackModelList
+from .http_client import LIMITS
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Initialize Gemini client
-client = genai.Client(api_key=os.environ.get("GEMINI_API_KEY"))
+@lru_cache(maxsize=1)
+def _get_client() -> genai.Client:
+    """
+    Return the shared Gemini client, created on first use
+    
+    genai builds its own httpx clients, so share the pool limits rather than the pool.
+    """
+    return genai.Client(
+        api_key=os.environ.get("GEMINI_API_KEY"),
+        http_options=genai.types.HttpOptions(
+            client_args={"limits": LIMITS},
+            async_client_args={"limits": LIMITS},
+        ),
+    )
 
 # Models that support thinking_budget
-THINKING_ENABLED_MODELS = [
+THINKING_ENABLED_MODELS = frozenset({
     "gemini-2.5-flash-preview-04-17",
     "gemini-2.0-flash",
     "gemini-1.5-pro",
     "gemini-1.5-flash"
-]
+})
 
 
-def parse_thinking_suffix(model: str) -> Tuple[str, int]:
+@lru_cache(maxsize=256)
+def _parse_thinking_suffix(model: str) -> Tuple[str, int, Tuple[Tuple[int, str], ...]]:
     """
-    Parse a model name to check for thinking token budget suffixes.
-    Only works with the models in THINKING_ENABLED_MODELS.
-    
-    Supported formats:
-    - model:1k, model:4k, model:24k
-    - model:1000, model:1054, model:24576, etc. (any value between 0-24576)
+    Memoized parse behind parse_thinking_suffix
     
-    Args:
-        model: The model name potentially with a thinking suffix
-        
     Returns:
-        Tuple of (base_model_name, thinking_budget)
-        If no thinking suffix is found, thinking_budget will be 0
+        Tuple of (base_model_name, thinking_budget, log records), where the
+        log records are (level, message) pairs for the caller to emit
     """
+    notes: List[Tuple[int, str]] = []
+    
     # First check if the model name contains a colon
     if ":" not in model:
-        return model, 0
+        return model, 0, tuple(notes)
         
     # Split the model name on the first colon to handle models with multiple colons
     parts = model.split(":", 1)
@@ -54,49 +61,81 @@ def parse_thinking_suffix(model: str) -> Tuple[str, int]:
     
     # Check if the base model is in the supported models list
     if base_model not in THINKING_ENABLED_MODELS:
-        logger.warning(f"Model {base_model} does not support thinking, ignoring thinking suffix")
-        return base_model, 0
+        notes.append((logging.WARNING, f"Model {base_model} does not support thinking, ignoring thinking suffix"))
+        return base_model, 0, tuple(notes)
     
     # If there's no suffix or it's empty, return default values
     if not suffix:
-        return base_model, 0
+        return base_model, 0, tuple(notes)
     
     # Check if the suffix is a valid number (with optional 'k' suffix)
-    if re.match(r'^\d+k?$', suffix):
-        # Extract the numeric part and handle 'k' multiplier
-        if suffix.endswith('k'):
-            try:
-                thinking_budget = int(suffix[:-1]) * 1024
-            except ValueError:
-                logger.warning(f"Invalid thinking budget format: {suffix}, ignoring")
-                return base_model, 0
-        else:
-            try:
-                thinking_budget = int(suffix)
-                # If a small number like 1, 4, 24 is provided, assume it's in "k" (multiply by 1024)
-                if thinking_budget < 100:
-                    thinking_budget *= 1024
-            except ValueError:
-                logger.warning(f"Invalid thinking budget format: {suffix}, ignoring")
-                return base_model, 0
-        
-        # Adjust values outside the range
-        if thinking_budget < 0:
-            logger.warning(f"Thinking budget {thinking_budget} below minimum (0), using 0 instead")
-            thinking_budget = 0
-        elif thinking_budget > 24576:
-            logger.warning(f"Thinking budget {thinking_budget} above maximum (24576), using 24576 instead")
-            thinking_budget = 24576
-            
-        logger.info(f"Using thinking budget of {thinking_budget} tokens for model {base_model}")
-        return base_model, thinking_budget
-    else:
+    has_k = suffix.endswith('k')
+    digits = suffix[:-1] if has_k else suffix
+    if not digits.isdecimal():
         # If suffix is not a valid number format, ignore it
-        logger.warning(f"Invalid thinking budget format: {suffix}, ignoring")
-        return base_model, 0
+        notes.append((logging.WARNING, f"Invalid thinking budget format: {suffix}, ignoring"))
+        return base_model, 0, tuple(notes)
+    
+    # Handle the 'k' multiplier; a small bare number like 1, 4, 24 is also assumed to be in "k"
+    thinking_budget = int(digits)
+    if has_k or thinking_budget < 100:
+        thinking_budget *= 1024
+    
+    # Adjust values outside the range
+    if thinking_budget < 0:
+        notes.append((logging.WARNING, f"Thinking budget {thinking_budget} below minimum (0), using 0 instead"))
+        thinking_budget = 0
+    elif thinking_budget > 24576:
+        notes.append((logging.WARNING, f"Thinking budget {thinking_budget} above maximum (24576), using 24576 instead"))
+        thinking_budget = 24576
+        
+    notes.append((logging.INFO, f"Using thinking budget of {thinking_budget} tokens for model {base_model}"))
+    return base_model, thinking_budget, tuple(notes)
+
+
+def parse_thinking_suffix(model: str) -> Tuple[str, int]:
+    """
+    Parse a model name to check for thinking token budget suffixes.
+    Only works with the models in THINKING_ENABLED_MODELS.
+    
+    Supported formats:
+    - model:1k, model:4k, model:24k
+    - model:1000, model:1054, model:24576, etc. (any value between 0-24576)
+    
+    Args:
+        model: The model name potentially with a thinking suffix
+        
+    Returns:
+        Tuple of (base_model_name, thinking_budget)
+        If no thinking suffix is found, thinking_budget will be 0
+    """
+    base_model, thinking_budget, notes = _parse_thinking_suffix(model)
+    # Log on every call, including cache hits
+    for level, message in notes:
+        logger.log(level, message)
+    return base_model, thinking_budget
+
+
+def _output_limit(thinking_budget: int, max_output_tokens: Optional[int]) -> Optional[int]:
+    """
+    Compute the max_output_tokens value for a request
+    
+    Gemini counts thinking tokens against max_output_tokens, so the answer's
+    budget is added on top of the thinking budget.
+    
+    Args:
+        thinking_budget: The token budget for thinking, or 0 if thinking is disabled
+        max_output_tokens: Tokens allowed for the answer, or None for the model's default
+        
+    Returns:
+        The max_output_tokens value to send, or None to leave it unset
+    """
+    if not max_output_tokens:
+        return None
+    return thinking_budget + max_output_tokens
 
 
-def prompt_with_thinking(text: str, model: str, thinking_budget: int) -> str:
+def prompt_with_thinking(text: str, model: str, thinking_budget: int, max_output_tokens: Optional[int] = None) -> str:
     """
     Send a prompt to Google Gemini with thinking enabled and get a response.
     
@@ -104,6 +143,7 @@ def prompt_with_thinking(text: str, model: str, thinking_budget: int) -> str:
         text: The prompt text
         model: The base model name (without thinking suffix)
         thinking_budget: The token budget for thinking
+        max_output_tokens: Optional limit on the answer, on top of the thinking budget
         
     Returns:
         Response string from the model
@@ -111,13 +151,14 @@ def prompt_with_thinking(text: str, model: str, thinking_budget: int) -> str:
     try:
         logger.info(f"Sending prompt to Gemini model {model} with thinking budget {thinking_budget}")
         
-        response = client.models.generate_content(
+        response = _get_client().models.generate_content(
             model=model,
             contents=text,
             config=genai.types.GenerateContentConfig(
                 thinking_config=genai.types.ThinkingConfig(
                     thinking_budget=thinking_budget
-                )
+                ),
+                max_output_tokens=_output_limit(thinking_budget, max_output_tokens)
             )
         )
         
@@ -127,7 +168,7 @@ def prompt_with_thinking(text: str, model: str, thinking_budget: int) -> str:
         raise ValueError(f"Failed to get response from Gemini with thinking: {str(e)}")
 
 
-def prompt(text: str, model: str) -> str:
+def prompt(text: str, model: str, max_output_tokens: Optional[int] = None) -> str:
     """
     Send a prompt to Google Gemini and get a response.
     
@@ -136,6 +177,7 @@ def prompt(text: str, model: str) -> str:
     Args:
         text: The prompt text
         model: The model name, optionally with thinking suffix
+        max_output_tokens: Optional limit on the answer, on top of any thinking budget
         
     Returns:
         Response string from the model
@@ -145,15 +187,16 @@ def prompt(text: str, model: str) -> str:
     
     # If thinking budget is specified, use prompt_with_thinking
     if thinking_budget > 0:
-        return prompt_with_thinking(text, base_model, thinking_budget)
+        return prompt_with_thinking(text, base_model, thinking_budget, max_output_tokens)
     
     # Otherwise, use regular prompt
     try:
         logger.info(f"Sending prompt to Gemini model: {base_model}")
         
-        response = client.models.generate_content(
+        response = _get_client().models.generate_content(
             model=base_model,
-            contents=text
+            contents=text,
+            config=genai.types.GenerateContentConfig(max_output_tokens=max_output_tokens) if max_output_tokens else None
         )
         
         return response.text
@@ -162,36 +205,148 @@ def prompt(text: str, model: str) -> str:
         raise ValueError(f"Failed to get response from Gemini: {str(e)}")
 
 
-def list_models() -> List[str]:
+async def aprompt_with_thinking(
+    text: str,
+    model: str,
+    thinking_budget: int,
+    system: Optional[str] = None,
+    max_output_tokens: Optional[int] = None,
+) -> str:
+    """
+    Async variant of prompt_with_thinking using the client's async (aio) interface.
+    
+    Args:
+        text: The prompt text
+        model: The base model name (without thinking suffix)
+        thinking_budget: The token budget for thinking
+        system: Optional system instruction, sent separately from the user text
+        max_output_tokens: Optional limit on the answer, on top of the thinking budget
+        
+    Returns:
+        Response string from the model
+    """
+    try:
+        logger.info(f"Sending prompt to Gemini model {model} with thinking budget {thinking_budget}")
+        
+        response = await _get_client().aio.models.generate_content(
+            model=model,
+            contents=text,
+            config=genai.types.GenerateContentConfig(
+                system_instruction=system,
+                thinking_config=genai.types.ThinkingConfig(
+                    thinking_budget=thinking_budget
+                ),
+                max_output_tokens=_output_limit(thinking_budget, max_output_tokens)
+            )
+        )
+        
+        return response.text
+    except Exception as e:
+        logger.error(f"Error sending prompt with thinking to Gemini: {e}")
+        raise ValueError(f"Failed to get response from Gemini with thinking: {str(e)}")
+
+
+async def aprompt(text: str, model: str, system: Optional[str] = None, max_output_tokens: Optional[int] = None) -> str:
+    """
+    Async variant of prompt using the client's async (aio) interface.
+    
+    Automatically handles thinking suffixes in the model name (e.g., gemini-2.5-flash-preview-04-17:4k)
+    
+    Args:
+        text: The prompt text
+        model: The model name, optionally with thinking suffix
+        system: Optional system instruction, sent separately from the user text
+        max_output_tokens: Optional limit on the answer, on top of any thinking budget
+        
+    Returns:
+        Response string from the model
+    """
+    base_model, thinking_budget = parse_thinking_suffix(model)
+    
+    if thinking_budget > 0:
+        return await aprompt_with_thinking(text, base_model, thinking_budget, system, max_output_tokens)
+    
+    try:
+        logger.info(f"Sending prompt to Gemini model: {base_model}")
+        
+        response = await _get_client().aio.models.generate_content(
+            model=base_model,
+            contents=text,
+            config=genai.types.GenerateContentConfig(
+                system_instruction=system,
+                max_output_tokens=max_output_tokens
+            ) if system or max_output_tokens else None
+        )
+        
+        return response.text
+    except Exception as e:
+        logger.error(f"Error sending prompt to Gemini: {e}")
+        raise ValueError(f"Failed to get response from Gemini: {str(e)}")
+
+
+async def awarmup() -> None:
+    """
+    Open a connection in the async client's pool ahead of the first real call.
+    
+    Lists models with the aio interface so the TCP/TLS handshake is done at
+    startup; the connection then stays in the keep-alive pool. Failures are
+    logged and otherwise ignored.
+    """
+    try:
+        await _get_client().aio.models.list()
+        logger.info("Warmed up Gemini client")
+    except Exception as e:
+        logger.warning(f"Gemini warm-up failed: {e}")
+
+
+# Model catalog from the last successful list_models() call, with the
+# monotonic time it was fetched
+_models_cache: Optional[Tuple[float, List[str]]] = None
+MODELS_CACHE_TTL = 3600  # seconds
+
+# Returned by list_models() when the catalog cannot be fetched
+FALLBACK_MODELS = (
+    "gemini-1.5-pro",
+    "gemini-1.5-flash",
+    "gemini-1.5-flash-latest",
+    "gemini-1.0-pro",
+    "gemini-2.0-flash",
+    "gemini-2.5-flash-preview-04-17",
+)
+
+
+def list_models(client: Optional[genai.Client] = None) -> List[str]:
     """
     List available Google Gemini models.
     
+    Results from the shared client are cached for MODELS_CACHE_TTL seconds. If
+    the catalog cannot be fetched, FALLBACK_MODELS is returned as a
+    FallbackModelList and not cached.
+    
+    Args:
+        client: Client to query instead of the shared one; bypasses the cache
+    
     Returns:
         List of model names
     """
+    global _models_cache
+    if client is None and _models_cache is not None and time.monotonic() - _models_cache[0] < MODELS_CACHE_TTL:
+        return list(_models_cache[1])
+    
     try:
         logger.info("Listing Gemini models")
-        
-        # Get the list of models
-        models = []
-        available_models = client.list_models()
-        for m in available_models:
-            if "generateContent" in m.supported_generation_methods:
-                models.append(m.name)
-                
-        # Format model names - strip the "models/" prefix if present
-        formatted_models = [model.replace("models/", "") for model in models]
-        
-        return formatted_models
+        available_models = list((client or _get_client()).models.list())
     except Exception as e:
         logger.error(f"Error listing Gemini models: {e}")
-        # Return some known models if API fails
-        logger.info("Returning hardcoded list of known Gemini models")
-        return [
-            "gemini-1.5-pro",
-            "gemini-1.5-flash",
-            "gemini-1.5-flash-latest",
-            "gemini-1.0-pro",
-            "gemini-2.0-flash",
-            "gemini-2.5-flash-preview-04-17"
-        ]
\ No newline at end of file
+        return FallbackModelList(FALLBACK_MODELS)
+    
+    # Keep models that can generate content, without the "models/" prefix
+    models = [
+        m.name.replace("models/", "")
+        for m in available_models
+        if "generateContent" in (m.supported_actions or ())
+    ]
+    
+    if client is None:
+        _models_cache = (time.monotonic(), models)
+    return list(models)
@@ -0,0 +1,81 @@
+"""
+Shared HTTP connection pools for the provider SDK clients.
+"""
+
+import asyncio
+import importlib.util
+import weakref
+from functools import lru_cache
+from typing import Any, Callable, Dict, TypeVar
+
+import httpx
+
+T = TypeVar("T")
+
+# Pool limits sized for concurrent board calls. httpx closes idle connections
+# after 5 seconds by default, so a decision started a few seconds after the
+# last one would pay for fresh TCP and TLS handshakes; keep them for a minute.
+LIMITS = httpx.Limits(
+    max_connections=64,
+    max_keepalive_connections=32,
+    keepalive_expiry=60.0,
+)
+
+# Request timeout for new pools; the app sets it from Settings.http_timeout through configure()
+_timeout = httpx.Timeout(120.0)
+
+# HTTP/2 multiplexes concurrent calls over one connection, but needs the optional h2 package
+HTTP2 = importlib.util.find_spec("h2") is not None
+
+# The async pool and the SDK clients built on it, per event loop: an async
+# pool's connections belong to the loop that opened them
+_loop_locals: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, Any]]" = weakref.WeakKeyDictionary()
+
+
+def configure(timeout: float) -> None:
+    """
+    Set the request timeout, in seconds, for pools created from now on.
+    """
+    global _timeout
+    _timeout = httpx.Timeout(timeout)
+
+
+@lru_cache(maxsize=1)
+def get_http_client() -> httpx.Client:
+    """
+    Return the synchronous pool shared by the OpenAI and Anthropic clients, created on first use.
+    """
+    return httpx.Client(limits=LIMITS, timeout=_timeout, http2=HTTP2)
+
+
+def loop_local(name: str, factory: Callable[[], T]) -> T:
+    """
+    Return the object stored under name for the running event loop, creating it with factory() on first use.
+    """
+    objects = _loop_locals.setdefault(asyncio.get_running_loop(), {})
+    if name not in objects:
+        objects[name] = factory()
+    return objects[name]
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """
+    Return the async pool shared by the OpenAI and Anthropic clients on the running event loop.
+    """
+    return loop_local("httpx", lambda: httpx.AsyncClient(limits=LIMITS, timeout=_timeout, http2=HTTP2))
+
+
+async def aclose() -> None:
+    """
+    Close the shared pools at application shutdown.
+
+    Closes the running loop's async pool, dropping the SDK clients built on it,
+    and the synchronous pool if one was created. Later calls get new pools.
+    """
+    objects = _loop_locals.pop(asyncio.get_running_loop(), {})
+    async_client = objects.get("httpx")
+    if async_client is not None:
+        await async_client.aclose()
+    if get_http_client.cache_info().currsize:
+        get_http_client().close()
+        get_http_client.cache_clear()
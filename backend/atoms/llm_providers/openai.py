@@ -14,26 +14,53 @@ basic functionality (and our tests) still work.
 """
 
 import os
+import time
 import re
 import logging
-from typing import List, Tuple
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 
-from dotenv import load_dotenv
+import httpx
 
 # Third‑party import guarded so that static analysis still works when the SDK
 # is absent.
-from openai import OpenAI  # type: ignore
-import logging
-from dotenv import load_dotenv
+from openai import AsyncOpenAI, OpenAI  # type: ignore
 
-# Load environment variables
-load_dotenv()
+from . import FallbackModelList
+from .http_client import get_async_http_client, get_http_client, loop_local
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Initialize OpenAI client once – reused across calls.
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+# Clients are created on first use, so importing this module stays cheap when
+# OpenAI models are never called.  Both share the pools from http_client; the
+# async client, like its pool, is kept per event loop.
+
+
+def _get_client() -> OpenAI:
+    """Return the shared synchronous OpenAI client, creating it on first use."""
+
+    return _client_for(get_http_client())
+
+
+@lru_cache(maxsize=1)
+def _client_for(pool: httpx.Client) -> OpenAI:
+    """Build the synchronous client on *pool*; a replaced pool gets a new client."""
+
+    return OpenAI(api_key=os.environ.get("OPENAI_API_KEY"), http_client=pool)
+
+
+def _get_async_client() -> AsyncOpenAI:
+    """Return the async OpenAI client for the running event loop, creating it on first use.
+
+    Callers on an event loop share its connection pool instead of tying up a
+    thread per request.
+    """
+
+    return loop_local(
+        "openai",
+        lambda: AsyncOpenAI(api_key=os.environ.get("OPENAI_API_KEY"), http_client=get_async_http_client()),
+    )
 
 # ---------------------------------------------------------------------------
 # Internal helpers
@@ -43,9 +70,16 @@ client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
 _REASONING_ELIGIBLE_MODELS = {"o4-mini", "o3-mini", "o3"}
 _REASONING_LEVELS = {"low", "medium", "high"}
 
+# System message for the chat fallback of each reasoning level, built once.
+_REASONING_SYSTEM_MESSAGES = {
+    level: {"role": "system", "content": f"Use {level} reasoning effort before answering."}
+    for level in _REASONING_LEVELS
+}
+
 
 # Public so that tests can import.
 
+@lru_cache(maxsize=256)
 def parse_reasoning_suffix(model: str) -> Tuple[str, str]:
     """Return (base_model, effort_level).
 
@@ -69,7 +103,19 @@ def parse_reasoning_suffix(model: str) -> Tuple[str, str]:
     return model, ""
 
 
-def _prompt_with_reasoning(text: str, model: str, effort: str) -> str:  # pragma: no cover – hits network
+def _token_limit(param: str, max_output_tokens: Optional[int]) -> Dict[str, int]:
+    """Return ``{param: max_output_tokens}``, or no arguments when no limit is set.
+
+    Chat completions take the limit as ``max_completion_tokens`` and the
+    Responses API as ``max_output_tokens``; without one the model's default applies.
+    """
+
+    return {param: max_output_tokens} if max_output_tokens else {}
+
+
+def _prompt_with_reasoning(
+    text: str, model: str, effort: str, max_output_tokens: Optional[int] = None
+) -> str:  # pragma: no cover – hits network
     """Call OpenAI *Responses* API with reasoning effort.
 
     Falls back transparently to chat completions if the installed SDK does not
@@ -84,12 +130,13 @@ def _prompt_with_reasoning(text: str, model: str, effort: str) -> str:  # pragma
     )
 
     # Prefer the official Responses endpoint when present.
-    if hasattr(client, "responses"):
+    if hasattr(_get_client(), "responses"):
         try:
-            response = client.responses.create(
+            response = _get_client().responses.create(
                 model=model,
                 reasoning={"effort": effort},
                 input=[{"role": "user", "content": text}],
+                **_token_limit("max_output_tokens", max_output_tokens),
             )
 
             # The modern SDK returns .output_text
@@ -110,15 +157,13 @@ def _prompt_with_reasoning(text: str, model: str, effort: str) -> str:  # pragma
     # accordingly.  This keeps tests functional if the Responses API is not
     # available in the runtime environment.
     try:
-        response = client.chat.completions.create(
+        response = _get_client().chat.completions.create(
             model=model,
             messages=[
-                {
-                    "role": "system",
-                    "content": f"Use {effort} reasoning effort before answering.",
-                },
+                _REASONING_SYSTEM_MESSAGES[effort],
                 {"role": "user", "content": text},
             ],
+            **_token_limit("max_completion_tokens", max_output_tokens),
         )
 
         return response.choices[0].message.content  # type: ignore[attr-defined]
@@ -127,24 +172,121 @@ def _prompt_with_reasoning(text: str, model: str, effort: str) -> str:  # pragma
         raise ValueError(f"Failed to get response from OpenAI: {exc}")
 
 
-def prompt(text: str, model: str) -> str:
+def prompt(text: str, model: str, max_output_tokens: Optional[int] = None) -> str:
     """Main prompt entry‑point for the OpenAI provider.
 
     Handles the optional ``:low|:medium|:high`` suffix on reasoning models.
     Falls back to regular chat completions when no suffix is detected.
+    *max_output_tokens*, if given, caps the length of the response.
     """
 
     base_model, effort = parse_reasoning_suffix(model)
 
     if effort:
-        return _prompt_with_reasoning(text, base_model, effort)
+        return _prompt_with_reasoning(text, base_model, effort, max_output_tokens)
 
     # Regular chat completion path
     try:
         logger.info("Sending prompt to OpenAI model: %s", base_model)
-        response = client.chat.completions.create(
+        response = _get_client().chat.completions.create(
             model=base_model,
             messages=[{"role": "user", "content": text}],
+            **_token_limit("max_completion_tokens", max_output_tokens),
+        )
+
+        return response.choices[0].message.content  # type: ignore[attr-defined]
+    except Exception as exc:
+        logger.error("Error sending prompt to OpenAI: %s", exc)
+        raise ValueError(f"Failed to get response from OpenAI: {exc}")
+
+
+def _chat_messages(text: str, system: Optional[str]) -> List[Dict[str, str]]:
+    """Build chat messages with the static *system* prompt ahead of the user text.
+
+    Keeping the system prompt in its own leading message gives every call the
+    same prefix, which OpenAI's automatic prompt caching can reuse.
+    """
+
+    if system:
+        return [{"role": "system", "content": system}, {"role": "user", "content": text}]
+    return [{"role": "user", "content": text}]
+
+
+async def _aprompt_with_reasoning(
+    text: str,
+    model: str,
+    effort: str,
+    system: Optional[str] = None,
+    max_output_tokens: Optional[int] = None,
+) -> str:  # pragma: no cover – hits network
+    """Async variant of :func:`_prompt_with_reasoning` using ``_get_async_client()``."""
+
+    if not effort:
+        raise ValueError("effort must be 'low', 'medium', or 'high'")
+
+    logger.info(
+        "Sending prompt to OpenAI reasoning model %s with effort '%s'", model, effort
+    )
+
+    if hasattr(_get_async_client(), "responses"):
+        try:
+            response = await _get_async_client().responses.create(
+                model=model,
+                reasoning={"effort": effort},
+                input=[{"role": "user", "content": text}],
+                **({"instructions": system} if system else {}),
+                **_token_limit("max_output_tokens", max_output_tokens),
+            )
+
+            output_text = getattr(response, "output_text", None)
+            if output_text is not None:
+                return output_text
+
+            if hasattr(response, "choices") and response.choices:
+                return response.choices[0].message.content  # type: ignore[attr-defined]
+
+            raise ValueError("Unexpected response format from OpenAI responses API")
+        except Exception as exc:  # pragma: no cover – keep behaviour consistent
+            logger.warning("Responses API failed (%s); falling back to chat", exc)
+
+    try:
+        response = await _get_async_client().chat.completions.create(
+            model=model,
+            messages=[
+                _REASONING_SYSTEM_MESSAGES[effort],
+                *_chat_messages(text, system),
+            ],
+            **_token_limit("max_completion_tokens", max_output_tokens),
+        )
+
+        return response.choices[0].message.content  # type: ignore[attr-defined]
+    except Exception as exc:
+        logger.error("Error sending prompt to OpenAI (fallback chat): %s", exc)
+        raise ValueError(f"Failed to get response from OpenAI: {exc}")
+
+
+async def aprompt(
+    text: str, model: str, system: Optional[str] = None, max_output_tokens: Optional[int] = None
+) -> str:
+    """Async variant of :func:`prompt`.
+
+    Same suffix handling, but awaits ``_get_async_client()`` so that many calls can
+    be in flight on one event loop. *system*, if given, is sent as a separate
+    system message rather than concatenated into *text*. *max_output_tokens*,
+    if given, caps the length of the response.
+    """
+
+    base_model, effort = parse_reasoning_suffix(model)
+
+    if effort:
+        return await _aprompt_with_reasoning(text, base_model, effort, system, max_output_tokens)
+
+    try:
+        logger.info("Sending prompt to OpenAI model: %s", base_model)
+        response = await _get_async_client().chat.completions.create(
+            model=base_model,
+            messages=_chat_messages(text, system),
+            **_token_limit("max_completion_tokens", max_output_tokens),
         )
 
         return response.choices[0].message.content  # type: ignore[attr-defined]
@@ -153,28 +295,64 @@ def prompt(text: str, model: str) -> str:
         raise ValueError(f"Failed to get response from OpenAI: {exc}")
 
 
-def list_models() -> List[str]:
+async def awarmup() -> None:
+    """Open a connection in the shared async pool ahead of the first real call.
+
+    Lists models with ``_get_async_client()`` so the TCP/TLS handshake is done at
+    startup; the connection then stays in the keep-alive pool.  Failures are
+    logged and otherwise ignored.
+    """
+
+    try:
+        await _get_async_client().models.list()
+        logger.info("Warmed up OpenAI client")
+    except Exception as exc:
+        logger.warning("OpenAI warm-up failed: %s", exc)
+
+
+# Model catalog from the last successful list_models() call, with the
+# monotonic time it was fetched
+_models_cache: Optional[Tuple[float, List[str]]] = None
+MODELS_CACHE_TTL = 3600  # seconds
+
+# Returned by list_models() when the catalog cannot be fetched
+FALLBACK_MODELS = (
+    "gpt-4o-mini",
+    "o4-mini",
+    "o3-mini",
+    "o3",
+    "text-davinci-003",
+)
+
+
+def list_models(client: Optional[OpenAI] = None) -> List[str]:
     """
     List available OpenAI models.
 
+    Results from the shared client are cached for MODELS_CACHE_TTL seconds. If
+    the catalog cannot be fetched, FALLBACK_MODELS is returned as a
+    FallbackModelList and not cached.
+
+    Args:
+        client: Client to query instead of the shared one; bypasses the cache
+
     Returns:
         List of model names
     """
+    global _models_cache
+    if client is None and _models_cache is not None and time.monotonic() - _models_cache[0] < MODELS_CACHE_TTL:
+        return list(_models_cache[1])
+
     try:
         logger.info("Listing OpenAI models")
-        response = client.models.list()
+        response = (client or _get_client()).models.list()
+    except Exception as exc:
+        logger.error("Error listing OpenAI models: %s", exc)
+        return FallbackModelList(FALLBACK_MODELS)
 
-        # Return all models without filtering
-        models = [model.id for model in response.data]
+    # Return all models without filtering
+    models = [model.id for model in response.data]
 
-        return models
-    except Exception as exc:
-        # Networking errors shouldn't break the caller – return a minimal hard‑coded list.
-        logger.warning("Error listing OpenAI models via API (%s). Returning fallback list.", exc)
-        return [
-            "gpt-4o-mini",
-            "o4-mini",
-            "o3-mini",
-            "o3",
-            "text-davinci-003",
-        ]
\ No newline at end of file
+    if client is None:
+        _models_cache = (time.monotonic(), models)
+    return list(models)
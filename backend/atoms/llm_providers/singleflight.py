@@ -0,0 +1,80 @@
+"""
+Single-flight calls: concurrent callers with the same key share one request.
+"""
+
+import asyncio
+import weakref
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call:
+    """
+    A shared in-flight task and the number of callers awaiting it.
+    """
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Registry of in-flight calls, keyed by the caller.
+
+    Concurrent run() calls with the same key share one task and all receive
+    its result (or its exception). Cancelling a caller leaves the task running
+    for the callers still waiting on it; once the last one is cancelled, the
+    task is cancelled too, so nobody keeps paying for a call nobody wants.
+    Tasks are bound to their event loop, so keep one registry per loop.
+    """
+
+    def __init__(self) -> None:
+        self._calls: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Hashable, _Call]]" = weakref.WeakKeyDictionary()
+
+    def __contains__(self, key: Hashable) -> bool:
+        """
+        Whether a call with this key is in flight on the running event loop.
+        """
+        return key in self._calls.get(asyncio.get_running_loop(), {})
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[T]]) -> T:
+        """
+        Await the in-flight call for key, starting factory() if there is none.
+
+        Args:
+            key: Identifies calls that may share a result
+            factory: Returns the awaitable to run when no call is in flight
+
+        Returns:
+            The result of the shared call
+        """
+        calls = self._calls.setdefault(asyncio.get_running_loop(), {})
+        call = calls.get(key)
+        if call is None:
+            call = calls[key] = _Call(asyncio.ensure_future(factory()))
+            call.task.add_done_callback(lambda task: _finish(calls, key, call))
+
+        call.waiters += 1
+        try:
+            # Shield the shared task so cancelling this caller does not cancel it for the others
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # The last caller was cancelled; stop the call and let the next caller start afresh
+                _finish(calls, key, call)
+                call.task.cancel()
+
+
+def _finish(calls: Dict[Hashable, _Call], key: Hashable, call: _Call) -> None:
+    """
+    Remove a call from the registry once it is finished or abandoned.
+    """
+    if calls.get(key) is call:
+        del calls[key]
+    # Mark the exception as retrieved in case every caller was cancelled
+    if call.task.done() and not call.task.cancelled():
+        call.task.exception()
@@ -7,12 +7,15 @@ setup(
     install_requires=[
         "fastapi>=0.95.0",
         "uvicorn>=0.21.1",
+        "httpx>=0.24.0",
         "pydantic>=2.0.0",
-        "pydantic-settings>=2.0.0",
         "python-dotenv>=1.0.0",
         "openai>=1.0.0",
         "anthropic>=0.5.0",
         "google-genai>=1.0.0",
+        "lxml>=5.0.0",
+        "orjson>=3.9.0",
+        "cachetools>=5.0.0",
     ],
     python_requires=">=3.9",
 )
\ No newline at end of file
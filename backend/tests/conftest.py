@@ -1,25 +1,104 @@
 import os
+import shutil
+import tempfile
 
-# Ensure required API keys are set before importing application modules
-# that instantiate provider clients at import time.
+# Ensure required API keys are set before importing application modules;
+# provider clients read them when they are first created.
 os.environ.setdefault("OPENAI_API_KEY", "test-key")
 os.environ.setdefault("ANTHROPIC_API_KEY", "test-key")
 os.environ.setdefault("GEMINI_API_KEY", "test-key")
 
+from dataclasses import dataclass
+from pathlib import Path
+
 import pytest
-from fastapi.testclient import TestClient
-from app.main import app
 import httpx
-from unittest.mock import patch, AsyncMock
+import orjson
+import respx
+from unittest.mock import AsyncMock
 
-@pytest.fixture
-def test_client():
+_JSON_HEADERS = {"content-type": "application/json"}
+
+# Temp directory holding this process's decision output, removed at exit
+_output_tmpdir = None
+
+def pytest_configure(config):
+    """
+    Point OUTPUT_DIR at a fresh temp directory before any test module imports the app
+
+    Settings are read once, when app modules are first imported during
+    collection, so the app must not be imported at the top of this module.
+    Each pytest-xdist worker gets its own directory.
+    """
+    global _output_tmpdir
+    _output_tmpdir = tempfile.mkdtemp(prefix="rely-ai-test-")
+    os.environ["OUTPUT_DIR"] = os.path.join(_output_tmpdir, "output")
+
+def pytest_unconfigure(config):
+    """
+    Remove the temp directory created in pytest_configure
+    """
+    if _output_tmpdir is not None:
+        shutil.rmtree(_output_tmpdir, ignore_errors=True)
+
+@pytest.fixture(scope="session", autouse=True)
+def test_environment():
+    """
+    Clear stale feature flags for the whole session
+
+    API keys and OUTPUT_DIR are set before collection instead, since they
+    must be in place before app.main is imported.
+    """
+    with pytest.MonkeyPatch.context() as mp:
+        mp.delenv("USE_SEPARATE_BOARD_CEO_MODELS", raising=False)
+        yield
+
+@pytest.fixture(autouse=True)
+def llm_cache():
+    """
+    Give each test a fresh response cache, so cached responses never leak between tests
+    """
+    from app.cache import get_llm_cache
+
+    get_llm_cache.cache_clear()
+    yield get_llm_cache()
+    get_llm_cache.cache_clear()
+
+@pytest.fixture(scope="session")
+async def test_client():
     """
-    Create a test client for FastAPI app
+    Async client for the FastAPI app, shared by the whole session
+
+    Requests go straight to the ASGI app in-process; the lifespan is not run.
+    """
+    from app.main import app
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+@pytest.fixture(scope="session")
+def output_dir():
+    """
+    Decision output root, the OUTPUT_DIR temp directory set in pytest_configure
+
+    Decision ids are unique, so tests can share the directory.
     """
-    return TestClient(app)
+    from app.config import get_settings
+
+    return Path(get_settings().output_dir)
 
 @pytest.fixture
+def mock_call_model(monkeypatch):
+    """
+    Replace app.service.call_model_with_retry with an AsyncMock
+
+    Tests set side_effect or return_value on the returned mock.
+    """
+    mock = AsyncMock()
+    monkeypatch.setattr("app.service.call_model_with_retry", mock)
+    return mock
+
+@pytest.fixture(scope="session")
 def mock_openai_response():
     """
     Mock response from OpenAI API
@@ -46,7 +125,7 @@ def mock_openai_response():
         }
     }
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_anthropic_response():
     """
     Mock response from Anthropic API
@@ -69,14 +148,41 @@ def mock_anthropic_response():
         }
     }
 
+@dataclass(frozen=True)
+class MockLLMPayloads:
+    """
+    Serialized mock API response bodies
+    """
+    openai: bytes
+    anthropic: bytes
+
+@pytest.fixture(scope="session")
+def mock_llm_payloads(mock_openai_response, mock_anthropic_response):
+    """
+    Mock API responses serialized once per session
+    """
+    return MockLLMPayloads(
+        openai=orjson.dumps(mock_openai_response),
+        anthropic=orjson.dumps(mock_anthropic_response),
+    )
+
 @pytest.fixture
-def mock_async_httpx_post():
+def mock_llm_api(mock_llm_payloads):
     """
-    Mock the httpx.AsyncClient.post method
+    Mock the OpenAI and Anthropic HTTP APIs at the httpx transport layer
+
+    Provider SDK calls go through the shared httpx clients and get the mocked
+    responses above; any other outgoing request fails. Routes match on the API
+    path so a custom OPENAI_BASE_URL or ANTHROPIC_BASE_URL still hits the mock.
     """
-    with patch("httpx.AsyncClient.post", new_callable=AsyncMock) as mock_post:
-        # Configuring the mock will be done in the tests
-        yield mock_post
+    with respx.mock(assert_all_called=False) as respx_mock:
+        respx_mock.post(url__regex=r".*/chat/completions$").mock(
+            return_value=httpx.Response(200, content=mock_llm_payloads.openai, headers=_JSON_HEADERS)
+        )
+        respx_mock.post(url__regex=r".*/messages$").mock(
+            return_value=httpx.Response(200, content=mock_llm_payloads.anthropic, headers=_JSON_HEADERS)
+        )
+        yield respx_mock
 
 @pytest.fixture
 def sample_xml_payload():
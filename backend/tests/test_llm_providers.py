@@ -1,11 +1,8 @@
 import pytest
 from unittest.mock import patch, MagicMock, AsyncMock
-import sys
-import os
 import asyncio
-
-# Add path for atoms package
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from types import SimpleNamespace
+from fastapi import HTTPException
 
 # Try importing LLM providers directly
 try:
@@ -14,8 +11,8 @@ try:
 except ImportError:
     PROVIDERS_AVAILABLE = False
 
-from app.utils import parse_model_name, validate_model_name
-from app.service import generate_board_decisions, generate_ceo_decision, call_model, process_board_responses
+from atoms.llm_providers import FallbackModelList
+from app.service import generate_board_decisions, generate_ceo_decision, call_model, call_model_with_retry, process_board_responses, list_available_models, warm_up_providers, ModelCallRetryError
 
 @pytest.mark.skipif(not PROVIDERS_AVAILABLE, reason="LLM providers not available")
 def test_openai_parse_reasoning_suffix():
@@ -48,6 +45,35 @@ def test_anthropic_parse_thinking_suffix():
     assert base == "claude-3-7-sonnet-20250219"
     assert budget == 2000
 
+@pytest.mark.skipif(not PROVIDERS_AVAILABLE, reason="LLM providers not available")
+def test_parse_thinking_suffix_logs_on_every_call(caplog):
+    """Test that suffix warnings are logged on cache hits too, not only on the first parse"""
+    with caplog.at_level("WARNING"):
+        for _ in range(2):
+            assert anthropic.parse_thinking_suffix("claude-3-5-haiku:4k") == ("claude-3-5-haiku", 0)
+            assert gemini.parse_thinking_suffix("gemini-1.0-pro:4k") == ("gemini-1.0-pro", 0)
+    
+    assert len([r for r in caplog.records if "does not support thinking" in r.getMessage()]) == 4
+
+@pytest.mark.skipif(not PROVIDERS_AVAILABLE, reason="LLM providers not available")
+def test_anthropic_max_tokens():
+    """Test that thinking prompts get the output budget on top of the thinking budget"""
+    with patch('atoms.llm_providers.anthropic._get_client') as mock_client:
+        mock_create = mock_client.return_value.messages.create
+        mock_create.return_value = SimpleNamespace(content=[SimpleNamespace(type="text", text="Budgeted response")])
+
+        anthropic.prompt("Budget prompt", "claude-3-7-sonnet-20250219")
+        assert mock_create.call_args.kwargs["max_tokens"] == anthropic.DEFAULT_MAX_OUTPUT_TOKENS
+
+        anthropic.prompt("Budget prompt", "claude-3-7-sonnet-20250219:2000")
+        assert mock_create.call_args.kwargs["max_tokens"] == 2000 + anthropic.DEFAULT_THINKING_OUTPUT_TOKENS
+
+        anthropic.prompt("Budget prompt", "claude-3-7-sonnet-20250219", max_output_tokens=300)
+        assert mock_create.call_args.kwargs["max_tokens"] == 300
+
+        anthropic.prompt("Budget prompt", "claude-3-7-sonnet-20250219:2000", max_output_tokens=300)
+        assert mock_create.call_args.kwargs["max_tokens"] == 2300
+
 @pytest.mark.skipif(not PROVIDERS_AVAILABLE, reason="LLM providers not available")
 def test_gemini_parse_thinking_suffix():
     """Test parsing thinking suffixes for Gemini models"""
@@ -62,103 +88,346 @@ def test_gemini_parse_thinking_suffix():
     assert budget == 2000
 
 
+class _StubModelsClient:
+    """Minimal client exposing models.list() for the list_models tests"""
+    
+    def __init__(self, model_ids):
+        self.models = self
+        self._page = SimpleNamespace(data=[SimpleNamespace(id=model_id) for model_id in model_ids])
+    
+    def list(self):
+        return self._page
+
 @pytest.mark.skipif(not PROVIDERS_AVAILABLE, reason="LLM providers not available")
 def test_list_models():
     """Test listing models from providers"""
-    # Mock the API calls
-    with patch('atoms.llm_providers.openai.client.models.list') as mock_openai_list, \
-         patch('atoms.llm_providers.anthropic.client.models.list') as mock_anthropic_list:
-        
-        # Setup mock responses
-        mock_openai_model = MagicMock()
-        mock_openai_model.id = "o4-mini"
-        mock_openai_list.return_value = MagicMock(data=[mock_openai_model])
-        
-        mock_anthropic_model = MagicMock()
-        mock_anthropic_model.id = "claude-3-7-sonnet"
-        mock_anthropic_list.return_value = MagicMock(data=[mock_anthropic_model])
-        
-        # Test OpenAI model listing
-        openai_models = openai.list_models()
-        assert "o4-mini" in openai_models
-        
-        # Test Anthropic model listing
-        anthropic_models = anthropic.list_models()
-        assert "claude-3-7-sonnet" in anthropic_models
-        
-        # For Gemini, we'll just call the function which already has a fallback to hardcoded models
-        # This avoids complex mocking of the client.list_models method
-        gemini_models = gemini.list_models()
-        assert len(gemini_models) > 0
-        # Check if one of the hardcoded models is in the list
-        assert any(model.startswith("gemini-") for model in gemini_models)
-
-def test_utils_parse_model_name():
-    """Test parsing model names in utils module"""
-    # OpenAI models
-    provider, base, suffix = parse_model_name("o4-mini:high")
-    assert provider == "openai"
-    assert base == "o4-mini"
-    assert suffix == "high"
+    # Test OpenAI model listing against a stub client
+    openai_models = openai.list_models(client=_StubModelsClient(["o4-mini"]))
+    assert "o4-mini" in openai_models
     
-    # Anthropic models
-    provider, base, suffix = parse_model_name("claude-3-7-sonnet:4k")
-    assert provider == "anthropic"
-    assert base == "claude-3-7-sonnet"
-    assert suffix == "4k"
+    # Test Anthropic model listing against a stub client
+    anthropic_models = anthropic.list_models(client=_StubModelsClient(["claude-3-7-sonnet"]))
+    assert "claude-3-7-sonnet" in anthropic_models
     
-    # Gemini models
-    provider, base, suffix = parse_model_name("gemini-1.5-pro:4k")
-    assert provider == "gemini"
-    assert base == "gemini-1.5-pro"
-    assert suffix == "4k"
+    # Gemini lists models with their supported actions; keep those that generate content
+    gemini_client = SimpleNamespace(models=SimpleNamespace(list=lambda: [
+        SimpleNamespace(name="models/gemini-2.0-flash", supported_actions=["generateContent"]),
+        SimpleNamespace(name="models/text-embedding-004", supported_actions=["embedContent"]),
+    ]))
+    assert gemini.list_models(client=gemini_client) == ["gemini-2.0-flash"]
+
+@pytest.mark.skipif(not PROVIDERS_AVAILABLE, reason="LLM providers not available")
+def test_list_models_falls_back_on_failure():
+    """Test that a failed catalog request returns the hardcoded list without caching it"""
+    class _FailingModelsClient:
+        def __init__(self):
+            self.models = self
+        
+        def list(self):
+            raise ConnectionError("network down")
+    
+    with patch.object(openai, "_get_client", return_value=_FailingModelsClient()), \
+         patch.object(openai, "_models_cache", None):
+        models = openai.list_models()
+        
+        assert isinstance(models, FallbackModelList)
+        assert models == list(openai.FALLBACK_MODELS)
+        assert openai._models_cache is None
+
+@pytest.mark.skipif(not PROVIDERS_AVAILABLE, reason="LLM providers not available")
+def test_async_http_client_is_per_loop_and_closed_at_shutdown():
+    """Test that each event loop gets its own async connection pool, closed by http_client.aclose()"""
+    from atoms.llm_providers import http_client
+    
+    async def use_and_close():
+        client = http_client.get_async_http_client()
+        assert http_client.get_async_http_client() is client
+        await http_client.aclose()
+        return client
+    
+    with patch.object(http_client, "get_http_client") as mock_sync_client:
+        first = asyncio.run(use_and_close())
+        second = asyncio.run(use_and_close())
+    
+    assert first is not second
+    assert first.is_closed and second.is_closed
+    assert mock_sync_client.return_value.close.call_count == 2
+
+@pytest.mark.skipif(not PROVIDERS_AVAILABLE, reason="LLM providers not available")
+def test_sync_http_client_is_replaced_after_shutdown():
+    """Test that the sync pool is rebuilt after aclose() and uses the configured timeout"""
+    from atoms.llm_providers import http_client
+    from app.config import get_settings
+    
+    closed = http_client.get_http_client()
+    old_sdk_client = openai._get_client()
+    asyncio.run(http_client.aclose())
     
-    # No suffix
-    provider, base, suffix = parse_model_name("gpt-4o")
-    assert provider == "openai"
-    assert base == "gpt-4o"
-    assert suffix is None
+    replacement = http_client.get_http_client()
+    assert closed.is_closed and not replacement.is_closed
+    assert replacement.timeout.read == get_settings().http_timeout
+    assert openai._get_client() is not old_sdk_client
+
+@pytest.mark.skipif(not PROVIDERS_AVAILABLE, reason="LLM providers not available")
+@pytest.mark.asyncio
+async def test_aprompt_many_dispatches_and_bounds_concurrency():
+    """Test that aprompt_many routes each model to its provider, keeps order and limits concurrency"""
+    from atoms.llm_providers import aprompt_many
+    in_flight = 0
+    peak = 0
+    
+    async def fake_aprompt(text, model):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return f"{model}: {text}"
     
-    # Unknown provider
-    provider, base, suffix = parse_model_name("unknown-model")
-    assert provider is None
-    assert base == "unknown-model"
-    assert suffix is None
+    with patch('atoms.llm_providers.openai.aprompt', side_effect=fake_aprompt), \
+         patch('atoms.llm_providers.anthropic.aprompt', side_effect=fake_aprompt):
+        items = [("q1", "gpt-4o"), ("q2", "claude-3-7-sonnet-20250219"), ("q3", "o4-mini"), ("q4", "gpt-4o")]
+        results = await aprompt_many(items, concurrency=2)
+    
+    assert results == ["gpt-4o: q1", "claude-3-7-sonnet-20250219: q2", "o4-mini: q3", "gpt-4o: q4"]
+    assert peak == 2
 
-def test_utils_validate_model_name():
-    """Test validating model names in utils module"""
-    # Valid OpenAI models
-    assert validate_model_name("gpt-4o")
-    assert validate_model_name("o4-mini:high")
+@pytest.mark.skipif(not PROVIDERS_AVAILABLE, reason="LLM providers not available")
+@pytest.mark.asyncio
+async def test_aprompt_many_coalesces_identical_prompts():
+    """Test that identical (text, model) pairs in a batch share one provider call"""
+    from atoms.llm_providers import aprompt_many
     
-    # Valid Anthropic models
-    assert validate_model_name("claude-3-7-sonnet:4k")
+    async def fake_aprompt(text, model):
+        await asyncio.sleep(0.01)
+        return f"{model}: {text}"
     
-    # Valid Gemini models
-    assert validate_model_name("gemini-1.5-pro")
-    assert validate_model_name("gemini-2.0-flash:4k")
+    with patch('atoms.llm_providers.openai.aprompt', side_effect=fake_aprompt) as mock_aprompt:
+        results = await aprompt_many([("q1", "gpt-4o"), ("q1", "gpt-4o"), ("q1", "gpt-4o-mini")])
     
-    # Invalid models
-    assert not validate_model_name("invalid-model")
+    assert results == ["gpt-4o: q1", "gpt-4o: q1", "gpt-4o-mini: q1"]
+    assert mock_aprompt.call_count == 2
+
+@pytest.mark.skipif(not PROVIDERS_AVAILABLE, reason="LLM providers not available")
+@pytest.mark.asyncio
+async def test_aprompt_many_cancels_abandoned_calls():
+    """Test that cancelling a batch cancels the shared provider call instead of leaving it running"""
+    from atoms.llm_providers import aprompt_many
+    cancelled = asyncio.Event()
+    
+    async def hanging_aprompt(text, model):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+    
+    with patch('atoms.llm_providers.openai.aprompt', side_effect=hanging_aprompt):
+        batch = asyncio.ensure_future(aprompt_many([("q1", "gpt-4o"), ("q1", "gpt-4o")]))
+        await asyncio.sleep(0.01)
+        batch.cancel()
+        
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
 
 @pytest.mark.asyncio
 async def test_call_model_with_roles():
     """Test that the call_model function passes the correct system prompts based on role"""
-    with patch('app.service.openai.prompt', return_value="Test response") as mock_openai_prompt:
+    with patch('atoms.llm_providers.openai.aprompt', new_callable=AsyncMock, return_value="Test response") as mock_openai_prompt:
         # Test board member role
         await call_model("gpt-4o", "Test prompt", is_ceo=False)
-        # Check that the first argument contains the board member system prompt
-        args = mock_openai_prompt.call_args[0]
-        assert "You are a board member providing a detailed analysis" in args[0]
+        # Check that the board member system prompt is passed separately from the prompt
+        args, kwargs = mock_openai_prompt.call_args
+        assert args[0] == "Test prompt"
+        assert "You are a board member providing a detailed analysis" in kwargs["system"]
         
         # Reset the mock for the CEO test
         mock_openai_prompt.reset_mock()
         
         # Test CEO role
         await call_model("gpt-4o", "Test prompt", is_ceo=True)
-        # Check that the first argument contains the CEO system prompt
-        args = mock_openai_prompt.call_args[0]
-        assert "You are the CEO making a final decision" in args[0]
+        # Check that the CEO system prompt is passed separately from the prompt
+        args, kwargs = mock_openai_prompt.call_args
+        assert args[0] == "Test prompt"
+        assert "You are the CEO making a final decision" in kwargs["system"]
+
+@pytest.mark.asyncio
+async def test_call_model_forwards_max_output_tokens():
+    """Test that call_model passes the output token budget to the provider and keys the cache on it"""
+    with patch('atoms.llm_providers.openai.aprompt', new_callable=AsyncMock, return_value="Test response") as mock_openai_prompt:
+        await call_model("gpt-4o", "Budget prompt", max_output_tokens=300)
+        assert mock_openai_prompt.call_args.kwargs["max_output_tokens"] == 300
+        
+        # A different budget is a different call, not a cache hit
+        await call_model("gpt-4o", "Budget prompt", max_output_tokens=600)
+        assert mock_openai_prompt.call_count == 2
+        assert mock_openai_prompt.call_args.kwargs["max_output_tokens"] == 600
+
+@pytest.mark.skipif(not PROVIDERS_AVAILABLE, reason="LLM providers not available")
+@pytest.mark.asyncio
+async def test_call_model_through_provider_http_api(mock_llm_api):
+    """Test call_model end to end through the provider SDKs, with HTTP mocked at the transport"""
+    assert await call_model("gpt-4o", "HTTP layer prompt") == "This is a mocked OpenAI response."
+    assert await call_model("claude-3-7-sonnet-20250219", "HTTP layer prompt") == "This is a mocked Anthropic response."
+    assert len(mock_llm_api.calls) == 2
+
+@pytest.mark.asyncio
+async def test_call_model_uses_response_cache():
+    """Test that a repeated call with the same model, role and prompt is served from the cache"""
+    with patch('atoms.llm_providers.openai.aprompt', new_callable=AsyncMock, return_value="Cached response") as mock_openai_prompt:
+        first = await call_model("gpt-4o", "Cache test prompt", is_ceo=False)
+        second = await call_model("gpt-4o", "Cache test prompt", is_ceo=False)
+        
+        assert first == second == "Cached response"
+        mock_openai_prompt.assert_called_once()
+        
+        # A different role is a different cache entry
+        await call_model("gpt-4o", "Cache test prompt", is_ceo=True)
+        assert mock_openai_prompt.call_count == 2
+
+@pytest.mark.asyncio
+async def test_in_memory_cache_honors_entry_ttl():
+    """Test that each entry in the in-memory response cache expires after its own TTL"""
+    from app.cache import InMemoryLRU
+    cache = InMemoryLRU(maxsize=4)
+    
+    await cache.set("expired", "stale response", 0)
+    await cache.set("live", "fresh response", 60)
+    
+    assert await cache.get("expired") is None
+    assert await cache.get("live") == "fresh response"
+
+@pytest.mark.asyncio
+async def test_call_model_with_retry_coalesces_identical_calls():
+    """Test that identical concurrent calls share one underlying model call"""
+    async def slow_call(model_name, prompt, is_ceo=False, max_output_tokens=None):
+        await asyncio.sleep(0.01)
+        return f"{model_name} response"
+    
+    with patch('app.service.call_model', side_effect=slow_call) as mock_call:
+        results = await asyncio.gather(
+            call_model_with_retry("gpt-4o", "Same prompt"),
+            call_model_with_retry("gpt-4o", "Same prompt"),
+            call_model_with_retry("claude-3-7-sonnet-20250219", "Same prompt"),
+        )
+        
+        assert results == ["gpt-4o response", "gpt-4o response", "claude-3-7-sonnet-20250219 response"]
+        assert mock_call.call_count == 2
+
+@pytest.mark.asyncio
+async def test_call_model_with_retry_keeps_shared_call_for_remaining_callers():
+    """Test that cancelling one of two callers leaves the shared call running for the other"""
+    async def slow_call(model_name, prompt, is_ceo=False, max_output_tokens=None):
+        await asyncio.sleep(0.01)
+        return f"{model_name} response"
+    
+    with patch('app.service.call_model', side_effect=slow_call) as mock_call:
+        first = asyncio.ensure_future(call_model_with_retry("gpt-4o", "Shared prompt"))
+        second = asyncio.ensure_future(call_model_with_retry("gpt-4o", "Shared prompt"))
+        await asyncio.sleep(0)
+        first.cancel()
+        
+        assert await second == "gpt-4o response"
+        assert first.cancelled()
+        assert mock_call.call_count == 1
+
+class _FakeAPIError(Exception):
+    """Stand-in for an SDK API error carrying an HTTP status and response headers"""
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(headers=headers or {})
+
+def _wrapped(exc):
+    """Wrap an API error in ValueError the way the provider modules do"""
+    try:
+        raise exc
+    except Exception:
+        try:
+            raise ValueError(f"Failed to get response: {exc}")
+        except ValueError as wrapped:
+            return wrapped
+
+@pytest.mark.asyncio
+async def test_call_model_with_retry_honors_retry_after():
+    """Test that a 429 with Retry-After waits the requested time rather than the backoff schedule"""
+    with patch('app.service.call_model', new_callable=AsyncMock) as mock_call, \
+         patch('app.service.asyncio.sleep', new_callable=AsyncMock) as mock_sleep, \
+         patch('app.service._rand', return_value=0.0):
+        mock_call.side_effect = [_wrapped(_FakeAPIError(429, {"retry-after": "0.5"})), "OK"]
+        
+        assert await call_model_with_retry("gpt-4o", "Retry-After prompt") == "OK"
+        mock_sleep.assert_awaited_once_with(0.5)
+
+@pytest.mark.asyncio
+async def test_call_model_with_retry_fails_fast_on_client_error():
+    """Test that a non-retryable 4xx is not retried"""
+    with patch('app.service.call_model', new_callable=AsyncMock) as mock_call, \
+         patch('app.service.asyncio.sleep', new_callable=AsyncMock) as mock_sleep:
+        mock_call.side_effect = _wrapped(_FakeAPIError(400))
+        
+        with pytest.raises(ModelCallRetryError):
+            await call_model_with_retry("gpt-4o", "Bad request prompt")
+        assert mock_call.call_count == 1
+        mock_sleep.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_board_failure_cancels_sibling_model_calls():
+    """Test that a failed board call cancels the underlying calls of the other board models"""
+    cancelled = asyncio.Event()
+    
+    async def board_call(model_name, prompt, is_ceo=False, max_output_tokens=None):
+        if model_name == "gpt-4o":
+            raise _wrapped(_FakeAPIError(400))
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return f"{model_name} response"
+    
+    with patch('app.service.call_model', side_effect=board_call):
+        with pytest.raises(HTTPException):
+            await process_board_responses(["claude-3-7-sonnet-20250219", "gpt-4o"], "Cancelled board prompt")
+        
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+
+def test_list_available_models_is_cached():
+    """Test that provider catalogs are fetched once and then served from the cache"""
+    provider = MagicMock()
+    provider.list_models.return_value = ["model-a"]
+    
+    with patch('app.service._load_provider', return_value=provider), \
+         patch.dict('app.service._model_list_cache', {"data": None, "expiry": 0.0}):
+        first = list_available_models()
+        second = list_available_models()
+        
+        assert first == second == {"openai": ["model-a"], "anthropic": ["model-a"], "gemini": ["model-a"]}
+        assert provider.list_models.call_count == 3
+
+def test_list_available_models_does_not_cache_failures():
+    """Test that a provider's fallback list is served but not cached, so the next call retries"""
+    provider = MagicMock()
+    provider.list_models.side_effect = [FallbackModelList(["model-b"]), ["model-a"], ["model-a"], ["model-a"], ["model-a"], ["model-a"]]
+    
+    with patch('app.service._load_provider', return_value=provider), \
+         patch.dict('app.service._model_list_cache', {"data": None, "expiry": 0.0}):
+        first = list_available_models()
+        second = list_available_models()
+        
+        assert sorted(first.values()) == [["model-a"], ["model-a"], ["model-b"]]
+        assert second == {"openai": ["model-a"], "anthropic": ["model-a"], "gemini": ["model-a"]}
+        assert provider.list_models.call_count == 6
+
+@pytest.mark.asyncio
+async def test_warm_up_providers_ignores_failures():
+    """Test that warm-up calls every configured provider and swallows errors"""
+    provider = MagicMock()
+    provider.awarmup = AsyncMock(side_effect=[None, RuntimeError("network down"), None])
+    
+    with patch('app.service._load_provider', return_value=provider):
+        await warm_up_providers()
+    
+    assert provider.awarmup.await_count == 3
 
 @pytest.mark.asyncio
 async def test_generate_board_decisions():
@@ -183,25 +452,72 @@ async def test_generate_board_decisions():
         assert result[1]["model_name"] == "model2"
 
 @pytest.mark.asyncio
-async def test_generate_ceo_decision():
+async def test_process_board_responses_calls_models_concurrently(mock_call_model):
+    """Test that board models are called concurrently, not one after another"""
+    in_flight = 0
+    peak = 0
+    
+    async def slow_call(model_name, prompt, is_ceo=False, max_output_tokens=None):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return f"{model_name} response"
+    
+    mock_call_model.side_effect = slow_call
+    
+    result = await process_board_responses(["gpt-4o", "o4-mini:high", "claude-3-7-sonnet-20250219"], "Board prompt")
+    
+    assert peak == 3
+    assert {r["model_name"]: r["response"] for r in result} == {
+        "gpt-4o": "gpt-4o response",
+        "o4-mini:high": "o4-mini:high response",
+        "claude-3-7-sonnet-20250219": "claude-3-7-sonnet-20250219 response",
+    }
+
+@pytest.mark.asyncio
+async def test_process_board_responses_cancels_siblings_on_failure(mock_call_model):
+    """Test that one failed board call cancels the calls still in flight"""
+    cancelled = asyncio.Event()
+    
+    async def board_call(model_name, prompt, is_ceo=False, max_output_tokens=None):
+        if model_name == "gpt-4o":
+            raise ModelCallRetryError("gpt-4o failed")
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return f"{model_name} response"
+    
+    mock_call_model.side_effect = board_call
+    
+    with pytest.raises(HTTPException) as exc_info:
+        await process_board_responses(["claude-3-7-sonnet-20250219", "gpt-4o"], "Board prompt")
+    
+    assert exc_info.value.status_code == 500
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+
+@pytest.mark.asyncio
+async def test_generate_ceo_decision(mock_call_model):
     """Test that generate_ceo_decision correctly calls call_model_with_retry"""
-    with patch('app.service.call_model_with_retry', new_callable=AsyncMock) as mock_call:
-        mock_call.return_value = "CEO decision"
-        
-        board_responses = [
-            {"model_name": "model1", "response": "Board response 1"},
-            {"model_name": "model2", "response": "Board response 2"}
-        ]
-        
-        result = await generate_ceo_decision(
-            ceo_model="ceo-model",
-            purpose="Test purpose",
-            factors="Test factors",
-            board_responses=board_responses
-        )
-        
-        # Check that the function was called with the correct parameters
-        mock_call.assert_called_once()
-        assert mock_call.call_args[0][0] == "ceo-model"  # ceo_model
-        assert mock_call.call_args[1]["is_ceo"] is True  # is_ceo parameter
-        assert result == "CEO decision"
\ No newline at end of file
+    mock_call_model.return_value = "CEO decision"
+    
+    board_responses = [
+        {"model_name": "model1", "response": "Board response 1"},
+        {"model_name": "model2", "response": "Board response 2"}
+    ]
+    
+    result = await generate_ceo_decision(
+        ceo_model="ceo-model",
+        purpose="Test purpose",
+        factors="Test factors",
+        board_responses=board_responses
+    )
+    
+    # Check that the function was called with the correct parameters
+    mock_call_model.assert_called_once()
+    assert mock_call_model.call_args[0][0] == "ceo-model"  # ceo_model
+    assert mock_call_model.call_args[1]["is_ceo"] is True  # is_ceo parameter
+    assert result == "CEO decision"
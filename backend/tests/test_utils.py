@@ -6,9 +6,21 @@ from app.utils import (
     parse_model_name,
     validate_model_name
 )
-import xml.etree.ElementTree as ET
-from pathlib import Path
-import os
+import re
+
+# Fragments the board prompt must contain
+REQUIRED_BOARD = (
+    "<purpose>Test purpose</purpose>",
+    "<factors>Test factors</factors>",
+    "<decision-resources>Test resources</decision-resources>",
+)
+
+# Both board responses, each with its model name, in input order
+CEO_BOARD_PATTERN = re.compile(
+    r"<model-name>gpt-4o</model-name>.*<response>Test response 1</response>"
+    r".*<model-name>claude-3\.5-sonnet</model-name>.*<response>Test response 2</response>",
+    re.S,
+)
 
 def test_parse_xml_input():
     # Test valid XML
@@ -67,9 +79,8 @@ def test_construct_board_prompt():
     
     prompt = construct_board_prompt(purpose, factors, resources)
     
-    assert "<purpose>Test purpose</purpose>" in prompt
-    assert "<factors>Test factors</factors>" in prompt
-    assert "<decision-resources>Test resources</decision-resources>" in prompt
+    missing = [s for s in REQUIRED_BOARD if s not in prompt]
+    assert not missing, f"Board prompt is missing {missing}"
 
 def test_construct_ceo_prompt():
     purpose = "Test purpose"
@@ -82,46 +93,43 @@ def test_construct_ceo_prompt():
     prompt = construct_ceo_prompt(purpose, factors, board_responses)
     
     assert "<original-question>Test purpose\n\nTest factors</original-question>" in prompt
-    assert "<model-name>gpt-4o</model-name>" in prompt
-    assert "<response>Test response 1</response>" in prompt
-    assert "<model-name>claude-3.5-sonnet</model-name>" in prompt
-    assert "<response>Test response 2</response>" in prompt
+    assert CEO_BOARD_PATTERN.search(prompt), "Board responses missing or out of order in CEO prompt"
 
-def test_parse_model_name():
-    # Test OpenAI models
-    provider, base, suffix = parse_model_name("gpt-4o")
-    assert provider == "openai"
-    assert base == "gpt-4o" 
-    assert suffix is None
+def test_construct_ceo_prompt_escapes_responses():
+    board_responses = [{"model_name": "gpt-4o", "response": "Use <b>A</b> & B"}]
     
-    provider, base, suffix = parse_model_name("o4-mini:high")
-    assert provider == "openai"
-    assert base == "o4-mini"
-    assert suffix == "high"
+    prompt = construct_ceo_prompt("Test purpose", "Test factors", board_responses)
     
-    # Test Anthropic models
-    provider, base, suffix = parse_model_name("claude-3.5-sonnet")
-    assert provider == "anthropic"
-    assert base == "claude-3.5-sonnet"
-    assert suffix is None
-    
-    provider, base, suffix = parse_model_name("claude-3-7-sonnet:4k")
-    assert provider == "anthropic"
-    assert base == "claude-3-7-sonnet"
-    assert suffix == "4k"
-    
-    # Test unknown model
-    provider, base, suffix = parse_model_name("unknown-model")
-    assert provider is None
-    assert base == "unknown-model"
-    assert suffix is None
+    assert "<response>Use &lt;b&gt;A&lt;/b&gt; &amp; B</response>" in prompt
 
-def test_validate_model_name():
+@pytest.mark.parametrize("name, expected", [
+    # OpenAI models
+    ("gpt-4o", ("openai", "gpt-4o", None)),
+    ("o4-mini:high", ("openai", "o4-mini", "high")),
+    # Anthropic models
+    ("claude-3.5-sonnet", ("anthropic", "claude-3.5-sonnet", None)),
+    ("claude-3-7-sonnet:4k", ("anthropic", "claude-3-7-sonnet", "4k")),
+    # Gemini models
+    ("gemini-1.5-pro:4k", ("gemini", "gemini-1.5-pro", "4k")),
+    # Unknown model
+    ("unknown-model", (None, "unknown-model", None)),
+])
+def test_parse_model_name(name, expected):
+    assert parse_model_name(name) == expected
+
+@pytest.mark.parametrize("name, ok", [
     # Valid models
-    assert validate_model_name("gpt-4o")
-    assert validate_model_name("o4-mini:high")
-    assert validate_model_name("claude-3.5-sonnet")
-    assert validate_model_name("claude-3-7-sonnet:4k")
-    
+    ("gpt-4o", True),
+    ("o4-mini:high", True),
+    ("claude-3.5-sonnet", True),
+    ("claude-3-7-sonnet:4k", True),
+    ("gemini-2.5-pro", True),
+    ("gemini-2.5-flash-preview-04-17:4k", True),
+    ("gemini-1.5-pro", True),
+    ("gemini-2.0-flash:4k", True),
     # Invalid models
-    assert not validate_model_name("unknown-model")
\ No newline at end of file
+    ("unknown-model", False),
+    ("invalid-model", False),
+])
+def test_validate_model_name(name, ok):
+    assert validate_model_name(name) is ok
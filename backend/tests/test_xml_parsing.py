@@ -1,11 +1,13 @@
+import hashlib
 import pytest
-import os
+import re
+from unittest.mock import patch
+from lxml.etree import XMLSyntaxError
 from app.utils import parse_xml_input
 
-def test_parse_xml_with_suffixed_models():
-    """Test parsing XML with models that have suffixes"""
-    # Create test XML directly (avoiding file dependency)
-    xml_content = """<root>
+# Request payloads as UTF-8 bytes, built and encoded once at import rather than
+# inside each test; parse_xml_input takes bytes directly
+SUFFIXED_MODELS_XML = b"""<root>
     <purpose>I want to rigorously evaluate whether purchasing a high-end computer under current budget constraints is a sound decision</purpose>
     <factors>
         1. Return on Investment 
@@ -25,58 +27,22 @@ def test_parse_xml_with_suffixed_models():
     Expected Useful Life: 5 years
     </decision-resources>
     </root>"""
-    
-    # Parse the XML
-    purpose, factors, resources, board_models, ceo_model = parse_xml_input(xml_content)
-    
-    # Check that purpose was extracted
-    assert "purchasing a high-end computer" in purpose
-    
-    # Check that factors were extracted
-    assert "Return on Investment" in factors
-    assert "Cash Flow Management" in factors
-    assert "Future Resale Value" in factors
-    
-    # Check that models with suffixes were extracted correctly
-    assert "o4-mini:medium" in board_models
-    assert "gpt-4o" in board_models
-    
-    # Check that CEO model was identified
-    assert ceo_model == "claude-3-7-sonnet:2k"
-    
-    # Check resources
-    assert "Computer Price: $5,000" in resources
-
 
-def test_parse_xml_missing_models():
-    """Test that an error is raised when board-models are missing"""
-    xml_content = """<root>
+MISSING_MODELS_XML = b"""<root>
     <purpose>Test purpose</purpose>
     <factors>Test factors</factors>
     <ceo-model name="claude-3-7-sonnet:2k" />
     <decision-resources>Test resources</decision-resources>
     </root>"""
-    
-    # Parsing should raise a ValueError due to missing board-models
-    with pytest.raises(ValueError, match="Missing required <board-models>"):
-        parse_xml_input(xml_content)
 
-def test_parse_xml_malformed():
-    """Test that an error is raised for malformed XML"""
-    xml_content = """
+MALFORMED_XML = b"""
     <purpose>Test purpose</purpose>
     <factors>Test factors</factors
     <board-models><model name="test-model" /></board-models>
     <decision-resources>Test resources</decision-resources>
     """
-    
-    # Parsing should raise an ET.ParseError due to malformed XML
-    with pytest.raises(Exception):
-        parse_xml_input(xml_content)
 
-def test_parse_xml_no_ceo():
-    """Test parsing XML with no CEO model designated"""
-    xml_content = """<root>
+NO_CEO_XML = b"""<root>
     <purpose>Test purpose</purpose>
     <factors>Test factors</factors>
     <board-models>
@@ -85,10 +51,68 @@ def test_parse_xml_no_ceo():
     </board-models>
     <decision-resources>Test resources</decision-resources>
     </root>"""
+
+
+# All three factors, in order, in a single search
+_SUFFIXED_FACTORS_RE = re.compile(r"Return on Investment.*?Cash Flow Management.*?Future Resale Value", re.S)
+
+@pytest.mark.parametrize("xml_content, expected, raises", [
+    pytest.param(
+        SUFFIXED_MODELS_XML,
+        {
+            "purpose": "purchasing a high-end computer",
+            "factors": _SUFFIXED_FACTORS_RE,
+            "resources": "Computer Price: $5,000",
+            "models": ("o4-mini:medium", "gpt-4o"),
+            "ceo_model": "claude-3-7-sonnet:2k",
+        },
+        None,
+        id="suffixed_models",
+    ),
+    pytest.param(
+        NO_CEO_XML,
+        {
+            "purpose": "Test purpose",
+            "factors": re.compile("Test factors"),
+            "resources": "Test resources",
+            "models": ("o4-mini:medium", "gpt-4o"),
+            "ceo_model": None,
+        },
+        None,
+        id="no_ceo",
+    ),
+    # A ValueError is raised due to missing board-models
+    pytest.param(MISSING_MODELS_XML, None, (ValueError, "Missing required <board-models>"), id="missing_models"),
+    # lxml's XMLSyntaxError propagates unchanged for malformed XML
+    pytest.param(MALFORMED_XML, None, (XMLSyntaxError, None), id="malformed"),
+])
+def test_parse_xml(xml_content, expected, raises):
+    """Test parsing request XML, including models with suffixes and error cases"""
+    if raises is not None:
+        exc_type, match = raises
+        with pytest.raises(exc_type, match=match):
+            parse_xml_input(xml_content)
+        return
     
-    # Parse the XML
     purpose, factors, resources, board_models, ceo_model = parse_xml_input(xml_content)
     
-    # No CEO model should be identified
-    assert ceo_model is None
+    assert expected["purpose"] in purpose
+    assert expected["factors"].search(factors)
+    assert expected["resources"] in resources
+    assert set(expected["models"]) <= set(board_models)
+    assert ceo_model == expected["ceo_model"]
+
+def test_parse_xml_repeated_payload_is_cached():
+    """Test that a resubmitted payload is served from the parse cache as a fresh list"""
+    from app import utils
+    utils._parse_cache.clear()
+    
+    with patch("app.utils._parse_xml_bytes", wraps=utils._parse_xml_bytes) as parse:
+        first = parse_xml_input(NO_CEO_XML)
+        first[3].append("mutated-model")
+        second = parse_xml_input(NO_CEO_XML.decode("utf-8"))
     
+    assert second[3] == ["o4-mini:medium", "gpt-4o"]
+    parse.assert_called_once()
+    # The cache keeps a digest of the payload, not the payload itself
+    assert list(utils._parse_cache) == [hashlib.blake2b(NO_CEO_XML, digest_size=16).digest()]